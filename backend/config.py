@@ -4,6 +4,7 @@ Centralizes all settings, constants, and environment variables.
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import cached_property
 from typing import List
 import os
 
@@ -17,9 +18,13 @@ class Settings(BaseSettings):
     # ---- Required Settings ----
     OLLAMA_API_KEY: str  # Required - will raise error if not set
     
+    # ---- Environment ----
+    ENVIRONMENT: str = "development"  # development or production
+    
     # ---- API Configuration ----
     API_TITLE: str = "AI-Learning API"
     API_VERSION: str = "0.1.0"
+    WORKER_THREADS: int = min(64, 4 * (os.cpu_count() or 1))  # Threadpool for blocking work
     API_DESCRIPTION: str = "Generate flashcards from PDFs or text using AI"
     
     # ---- CORS Settings ----
@@ -31,6 +36,9 @@ class Settings(BaseSettings):
     # ---- File Upload Limits ----
     MAX_FILE_SIZE_MB: int = 10
     ALLOWED_FILE_TYPES: List[str] = [".pdf"]
+    PDF_WORKERS: int = 0              # Processes for parallel page extraction (0 = in-thread)
+    PDF_PARALLEL_MIN_PAGES: int = 32  # Smaller PDFs are extracted in a single thread
+    PDF_CACHE_SIZE: int = 32          # Cached extractions of recent uploads (0 disables)
     
     # ---- Text Processing Limits ----
     MAX_TEXT_LENGTH: int = 500_000  # 500KB of text (~200 pages)
@@ -40,12 +48,21 @@ class Settings(BaseSettings):
     DEFAULT_FLASHCARD_COUNT: int = 5
     MIN_FLASHCARD_COUNT: int = 1
     MAX_FLASHCARD_COUNT: int = 20
+    FLASHCARD_CACHE_SIZE: int = 256  # Cached generation results (0 disables)
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Cosine similarity for reusing a near-duplicate's cards
+    MAX_GENERATION_CHUNKS: int = 4   # Text chunks sent to the LLM concurrently
+    MAX_PROMPT_TEXT_CHARS: int = 5000  # Source text per prompt, cut at a sentence end
     
     # ---- Ollama/LLM Configuration ----
     OLLAMA_HOST: str = "https://ollama.com"
     OLLAMA_MODEL: str = "gpt-oss:120b-cloud"
+    OLLAMA_TEMPERATURE: float = 0.3
     OLLAMA_TIMEOUT: int = 60  # seconds
     OLLAMA_MAX_RETRIES: int = 3
+    OLLAMA_MAX_CONCURRENCY: int = 8  # In-flight requests per worker
+    OLLAMA_BATCH_WINDOW_MS: int = 0  # Coalesce generation calls within this window (0 disables)
+    OLLAMA_BATCH_SIZE: int = 8       # Max documents per coalesced call
+    OLLAMA_EMBED_MODEL: str = ""     # Embedding model for the semantic cache (empty disables)
     
     # ---- Logging Configuration ----
     LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
@@ -58,13 +75,18 @@ class Settings(BaseSettings):
         extra="ignore"  # Ignore extra fields in .env
     )
     
-    # ---- Computed Properties ----
-    @property
+    # ---- Computed Properties (materialized once per process) ----
+    @cached_property
     def max_file_size_bytes(self) -> int:
         """Convert MB to bytes for file size validation"""
         return self.MAX_FILE_SIZE_MB * 1024 * 1024
     
-    @property
+    @cached_property
+    def max_upload_body_bytes(self) -> int:
+        """Largest acceptable /upload request body: a max-size file and text field (sent together) plus multipart framing"""
+        return self.max_file_size_bytes + self.MAX_TEXT_LENGTH * 4 + 64 * 1024
+    
+    @cached_property
     def ollama_headers(self) -> dict:
         """Generate headers for Ollama API requests"""
         return {"Authorization": f"Bearer {self.OLLAMA_API_KEY}"}
@@ -80,6 +102,15 @@ class Settings(BaseSettings):
         if self.MAX_FILE_SIZE_MB < 1:
             raise ValueError("MAX_FILE_SIZE_MB must be at least 1")
         
+        if self.WORKER_THREADS < 1:
+            raise ValueError("WORKER_THREADS must be at least 1")
+        
+        if self.PDF_WORKERS < 0:
+            raise ValueError("PDF_WORKERS cannot be negative")
+        
+        if self.PDF_CACHE_SIZE < 0:
+            raise ValueError("PDF_CACHE_SIZE cannot be negative")
+        
         if self.MAX_TEXT_LENGTH < 1000:
             raise ValueError("MAX_TEXT_LENGTH must be at least 1000 characters")
         
@@ -88,6 +119,27 @@ class Settings(BaseSettings):
         
         if self.DEFAULT_FLASHCARD_COUNT > self.MAX_FLASHCARD_COUNT:
             raise ValueError("DEFAULT_FLASHCARD_COUNT cannot exceed MAX_FLASHCARD_COUNT")
+        
+        if self.MAX_PROMPT_TEXT_CHARS < 500:
+            raise ValueError("MAX_PROMPT_TEXT_CHARS must be at least 500")
+        
+        if self.MAX_GENERATION_CHUNKS < 1:
+            raise ValueError("MAX_GENERATION_CHUNKS must be at least 1")
+        
+        if self.OLLAMA_MAX_CONCURRENCY < 1:
+            raise ValueError("OLLAMA_MAX_CONCURRENCY must be at least 1")
+        
+        if self.OLLAMA_BATCH_WINDOW_MS < 0:
+            raise ValueError("OLLAMA_BATCH_WINDOW_MS cannot be negative")
+        
+        if not 1 <= self.OLLAMA_BATCH_SIZE <= 256:
+            raise ValueError("OLLAMA_BATCH_SIZE must be between 1 and 256")
+        
+        if not 0 < self.SEMANTIC_CACHE_THRESHOLD <= 1:
+            raise ValueError("SEMANTIC_CACHE_THRESHOLD must be in (0, 1]")
+        
+        if self.OLLAMA_MAX_RETRIES < 0:
+            raise ValueError("OLLAMA_MAX_RETRIES cannot be negative")
 
 
 # ---- Singleton Instance ----
@@ -104,7 +156,7 @@ except Exception as e:
 # ---- Environment Check Helper ----
 def is_production() -> bool:
     """Check if running in production environment"""
-    return os.getenv("ENVIRONMENT", "development").lower() == "production"
+    return settings.ENVIRONMENT.lower() == "production"
 
 
 def is_development() -> bool:
@@ -121,6 +173,7 @@ def print_config_summary() -> None:
     print(f"Environment:        {'Production' if is_production() else 'Development'}")
     print(f"Ollama API Key:     {'✓ Configured' if settings.OLLAMA_API_KEY else '✗ Missing'}")
     print(f"Ollama Model:       {settings.OLLAMA_MODEL}")
+    print(f"Worker Threads:     {settings.WORKER_THREADS}")
     print(f"Max File Size:      {settings.MAX_FILE_SIZE_MB}MB")
     print(f"Max Text Length:    {settings.MAX_TEXT_LENGTH:,} chars")
     print(f"Default Flashcards: {settings.DEFAULT_FLASHCARD_COUNT}")
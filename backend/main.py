@@ -1,26 +1,19 @@
-from dotenv import load_dotenv
-load_dotenv()
-
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from anyio.to_thread import current_default_thread_limiter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
 
-from config import settings, print_config_summary
-from models import (
-    GenerateRequest,
-    UploadResponse,
-    GenerateResponse,
-    QuizResponse,
-    TestResponse,
-    HealthResponse,
-)
-from services.pdf_service import PDFService
-from services.llm_service import get_llm_service
+from config import settings, is_development, print_config_summary
+from middleware import SelectiveGZipMiddleware, UploadSizeLimitMiddleware
+from routers.api import router
+from services.pdf_service import shutdown_pdf_process_pool
+from services.llm_service import close_ollama_client, shutdown_llm_service
 
 # ---- Logging Configuration ----
 logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
+    level=logging.getLevelName(settings.LOG_LEVEL.upper()),
     format=settings.LOG_FORMAT
 )
 logger = logging.getLogger(__name__)
@@ -32,6 +25,11 @@ app = FastAPI(
     description=settings.API_DESCRIPTION
 )
 
+# Reject oversized uploads from Content-Length before the body is parsed.
+# Added first so it sits inside CORSMiddleware and its early 411/413
+# responses still carry CORS headers the browser needs to read them.
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -40,115 +38,29 @@ app.add_middleware(
     allow_headers=settings.CORS_HEADERS,
 )
 
-# ---- Initialize Services ----
-pdf_service = PDFService()
-llm_service = get_llm_service()
+# Extracted text compresses well; small responses aren't worth the CPU.
+# /generate/stream is left uncompressed so its lines aren't held back.
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024, compresslevel=5)
 
-
-# ---- API Endpoints ----
-
-@app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """
-    Check if the API is running and properly configured.
-    """
-    return HealthResponse(
-        status="healthy",
-        version=settings.API_VERSION,
-        ollama_configured=bool(settings.OLLAMA_API_KEY)
-    )
-
-
-@app.post("/upload", response_model=UploadResponse)
-async def upload(
-    file: Optional[UploadFile] = File(default=None),
-    text: Optional[str] = Form(default=None)
-):
-    """
-    Upload a PDF file or provide text directly for processing.
-    
-    - **file**: PDF file to extract text from (max configurable MB)
-    - **text**: Direct text input (max configurable characters)
-    
-    Returns extracted text split into manageable chunks.
-    """
-    logger.info(f"Upload request received - file: {file.filename if file else 'none'}, text_length: {len(text) if text else 0}")
-    
-    # Validate that at least one input is provided
-    if file is None and (text is None or text.strip() == ""):
-        raise HTTPException(
-            status_code=400,
-            detail="Please provide either a PDF file or text input"
-        )
-    
-    # Process based on input type
-    if file is not None:
-        # Process uploaded PDF
-        extracted_text, file_info = await pdf_service.validate_and_process_upload(file)
-    else:
-        # Process direct text input
-        extracted_text = pdf_service.process_text_input(text)
-        file_info = None
-    
-    # Chunk the text
-    chunks = pdf_service.chunk_text_safely(extracted_text)
-    
-    return UploadResponse(
-        extracted_text=extracted_text,
-        chunks=chunks,
-        file_info=file_info
-    )
-
-
-@app.post("/generate", response_model=GenerateResponse)
-async def generate(req: GenerateRequest):
-    """
-    Generate flashcards, quizzes, or tests from provided text.
-    
-    - **text**: Source text for generation (max configurable characters)
-    - **mode**: Type of content to generate (currently only "flashcards" supported)
-    - **num_cards**: Number of flashcards to generate (configurable range)
-    
-    Returns a list of generated flashcards with questions and answers.
-    """
-    logger.info(f"Generate request - mode: {req.mode}, text_length: {len(req.text)}, num_cards: {req.num_cards}")
-    
-    # Check if mode is supported
-    if req.mode != "flashcards":
-        raise HTTPException(
-            status_code=501,
-            detail=f"'{req.mode}' mode is not yet implemented. Currently only 'flashcards' mode is supported."
-        )
-    
-    # Generate flashcards using LLM service
-    try:
-        flashcards = llm_service.generate_flashcards(req.text, num_cards=req.num_cards)
-        logger.info(f"Successfully generated {len(flashcards)} flashcards")
-    except ValueError as e:
-        logger.error(f"Flashcard generation failed: {str(e)}")
-        raise HTTPException(
-            status_code=422,
-            detail=f"Failed to generate flashcards: {str(e)}"
-        )
-    except Exception as e:
-        logger.error(f"Unexpected error during generation: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=500,
-            detail="An error occurred while generating flashcards. Please try again."
-        )
-    
-    return GenerateResponse(
-        flashcards=flashcards,
-        summary=f"Generated {len(flashcards)} flashcards from {len(req.text)} characters of text"
-    )
+# ---- API Routes ----
+app.include_router(router)
 
 
 # ---- Startup Event ----
 @app.on_event("startup")
 async def startup_event():
-    """Log startup information and initialize services"""
-    print_config_summary()
-    logger.info("Services initialized successfully")
+    """Size worker threadpools and log startup information (full config summary in development only)"""
+    # Bound both Starlette's threadpool (anyio) and the executor behind asyncio.to_thread
+    current_default_thread_limiter().total_tokens = settings.WORKER_THREADS
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.WORKER_THREADS, thread_name_prefix="worker")
+    )
+    
+    if is_development():
+        print_config_summary()
+    else:
+        # Per-request access log lines are formatting and I/O on the hot path
+        logging.getLogger("uvicorn.access").disabled = True
     logger.info("API startup complete - ready to accept requests")
 
 
@@ -156,4 +68,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    logger.info("API shutting down...")
\ No newline at end of file
+    logger.info("API shutting down...")
+    shutdown_pdf_process_pool()
+    await shutdown_llm_service()
+    await close_ollama_client()
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+ASGI middleware for AI-Learning API.
+Rejects oversized uploads before their body is read and applies
+response compression to every route but streaming ones.
+"""
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config import settings
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Enforce the upload size limit from the Content-Length header.
+    
+    FastAPI parses (and spools) the whole multipart body before the
+    endpoint runs, so checking the size inside /upload is too late to
+    stop an oversized request. This answers 413 up front instead, and
+    411 for bodies without a declared length (chunked transfer), whose
+    size can't be checked before reading them.
+    
+    Implemented as plain ASGI rather than @app.middleware("http") to keep
+    per-request overhead off every other route.
+    """
+    
+    def __init__(self, app: ASGIApp, paths: tuple = ("/upload",)):
+        self.app = app
+        self.paths = frozenset(paths)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                content_length = value
+                break
+        
+        if content_length is None:
+            response = JSONResponse(
+                {"detail": "Content-Length header is required for uploads"},
+                status_code=411
+            )
+        elif not content_length.isdigit() or int(content_length) > settings.max_upload_body_bytes:
+            response = JSONResponse(
+                {"detail": f"File size exceeds {settings.MAX_FILE_SIZE_MB}MB limit"},
+                status_code=413
+            )
+        else:
+            await self.app(scope, receive, send)
+            return
+        
+        await response(scope, receive, send)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZip responses except on the given paths.
+    
+    The compressor buffers output until it has a full block, which would
+    hold back the lines of a streamed response; excluded paths are passed
+    through untouched instead.
+    """
+    
+    def __init__(self, app: ASGIApp, exclude_paths: tuple = ("/generate/stream",), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = frozenset(exclude_paths)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -3,11 +3,41 @@ Pydantic models for AI-Learning API.
 Defines request/response schemas with validation.
 """
 
-from pydantic import BaseModel, field_validator
-from typing import Literal, Optional, List
+from dataclasses import dataclass, field
+from pydantic import (
+    BaseModel, ConfigDict, Field, PrivateAttr, StringConstraints, TypeAdapter, ValidationError,
+    field_validator, model_validator
+)
+from typing import Annotated, FrozenSet, Literal, Optional, List, Tuple, Union
 from config import settings
 
 
+# ---- Constrained Types ----
+# Checked inside pydantic-core rather than by Python field validators.
+# Stripping comes from str_strip_whitespace=True on each model that uses it.
+NonEmptyStr = Annotated[str, StringConstraints(min_length=1)]
+
+# Settings snapshotted at import so field constraints are static
+_DEFAULT_FLASHCARD_COUNT = settings.DEFAULT_FLASHCARD_COUNT
+_MIN_FLASHCARD_COUNT = settings.MIN_FLASHCARD_COUNT
+_MAX_FLASHCARD_COUNT = settings.MAX_FLASHCARD_COUNT
+_MAX_TEXT_LENGTH = settings.MAX_TEXT_LENGTH
+
+
+def _add_example(schema: dict, model: type) -> None:
+    """
+    Attach the model's OpenAPI example to its JSON schema.
+    
+    Examples live in schema_examples, which is only imported when a
+    schema is generated (e.g. for /docs), keeping them off the import path.
+    """
+    from schema_examples import EXAMPLES
+    
+    example = EXAMPLES.get(model.__name__)
+    if example is not None:
+        schema["example"] = example
+
+
 # ---- Core Data Models ----
 
 class Flashcard(BaseModel):
@@ -16,121 +46,157 @@ class Flashcard(BaseModel):
     
     Used for both request/response and internal representation.
     """
-    question: str
-    answer: str
+    question: NonEmptyStr
+    answer: NonEmptyStr
     
-    @field_validator('question', 'answer')
     @classmethod
-    def validate_not_empty(cls, v: str) -> str:
-        """Ensure question and answer are not empty"""
-        if not v or not v.strip():
-            raise ValueError("Question and answer cannot be empty")
-        return v.strip()
+    def fast_construct(cls, question: str, answer: str) -> "Flashcard":
+        """
+        Build a Flashcard from trusted data without running validation.
+        
+        For internally produced values (e.g. our own LLM parser) whose
+        emptiness has already been checked; external input must go
+        through normal validation.
+        """
+        return cls.model_construct(question=question.strip(), answer=answer.strip())
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "question": "What is photosynthesis?",
-                "answer": "The process by which plants convert light energy into chemical energy"
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        extra="forbid",
+        frozen=True,
+        str_strip_whitespace=True
+    )
 
 
 class MultipleChoiceQuestion(BaseModel):
     """
     Multiple choice question with 4 options.
     """
-    question: str
-    options: List[str]  # Must have exactly 4 options
-    correct_answer: str  # Must be one of the options
+    kind: Literal["mcq"] = "mcq"  # Discriminator within TestResponse.questions
+    question: NonEmptyStr
+    options: Annotated[List[NonEmptyStr], Field(min_length=4, max_length=4)]  # Exactly 4 options
+    correct_answer: NonEmptyStr  # Must be one of the options
     explanation: Optional[str] = None
     
-    @field_validator('question', 'correct_answer')
-    @classmethod
-    def validate_not_empty(cls, v: str) -> str:
-        """Ensure fields are not empty"""
-        if not v or not v.strip():
-            raise ValueError("Question and answer cannot be empty")
-        return v.strip()
+    _options_set: FrozenSet[str] = PrivateAttr(default=frozenset())
+    
+    @model_validator(mode="after")
+    def _check_correct_answer(self) -> "MultipleChoiceQuestion":
+        """Ensure correct_answer is one of the options and cache them as a set"""
+        options_set = frozenset(self.options)
+        if self.correct_answer not in options_set:
+            raise ValueError("correct_answer must be one of the options")
+        self._options_set = options_set
+        return self
+    
+    def is_option(self, answer: str) -> bool:
+        """Check whether an answer matches one of the options"""
+        return answer.strip() in self._options_set
+    
+    def is_correct(self, answer: str) -> bool:
+        """Check whether an answer is the correct option"""
+        return answer.strip() == self.correct_answer
     
-    @field_validator('options')
     @classmethod
-    def validate_options(cls, v: List[str]) -> List[str]:
-        """Ensure exactly 4 options"""
-        if len(v) != 4:
-            raise ValueError("Must have exactly 4 options")
-        if any(not opt.strip() for opt in v):
-            raise ValueError("Options cannot be empty")
-        return [opt.strip() for opt in v]
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "question": "What is the primary function of chloroplasts?",
-                "options": [
-                    "Photosynthesis",
-                    "Cellular respiration",
-                    "Protein synthesis",
-                    "DNA replication"
-                ],
-                "correct_answer": "Photosynthesis",
-                "explanation": "Chloroplasts contain chlorophyll and are responsible for photosynthesis"
-            }
-        }
+    def fast_construct(
+        cls,
+        question: str,
+        options: List[str],
+        correct_answer: str,
+        explanation: Optional[str] = None
+    ) -> "MultipleChoiceQuestion":
+        """Build from trusted, pre-checked data without running validation."""
+        mcq = cls.model_construct(
+            question=question.strip(),
+            options=[opt.strip() for opt in options],
+            correct_answer=correct_answer.strip(),
+            explanation=explanation
+        )
+        mcq._options_set = frozenset(mcq.options)
+        return mcq
+    
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        defer_build=True,
+        extra="forbid",
+        frozen=True,
+        str_strip_whitespace=True
+    )
 
 
 class TrueFalseQuestion(BaseModel):
     """
     True/False question.
     """
-    question: str
+    kind: Literal["tf"] = "tf"
+    question: NonEmptyStr
     correct_answer: bool
     explanation: Optional[str] = None
     
-    @field_validator('question')
     @classmethod
-    def validate_not_empty(cls, v: str) -> str:
-        """Ensure question is not empty"""
-        if not v or not v.strip():
-            raise ValueError("Question cannot be empty")
-        return v.strip()
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "question": "Photosynthesis only occurs during daytime.",
-                "correct_answer": True,
-                "explanation": "Photosynthesis requires sunlight, so it only occurs during the day"
-            }
-        }
+    def fast_construct(
+        cls,
+        question: str,
+        correct_answer: bool,
+        explanation: Optional[str] = None
+    ) -> "TrueFalseQuestion":
+        """Build from trusted, pre-checked data without running validation."""
+        return cls.model_construct(
+            question=question.strip(),
+            correct_answer=correct_answer,
+            explanation=explanation
+        )
+    
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        defer_build=True,
+        extra="forbid",
+        frozen=True,
+        str_strip_whitespace=True
+    )
 
 
 class ShortAnswerQuestion(BaseModel):
     """
     Short answer question.
     """
-    question: str
-    correct_answer: str
+    kind: Literal["sa"] = "sa"
+    question: NonEmptyStr
+    correct_answer: NonEmptyStr
     acceptable_answers: Optional[List[str]] = None  # Alternative correct answers
     explanation: Optional[str] = None
     
-    @field_validator('question', 'correct_answer')
     @classmethod
-    def validate_not_empty(cls, v: str) -> str:
-        """Ensure fields are not empty"""
-        if not v or not v.strip():
-            raise ValueError("Question and answer cannot be empty")
-        return v.strip()
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "question": "What organelle is responsible for photosynthesis?",
-                "correct_answer": "chloroplast",
-                "acceptable_answers": ["chloroplasts", "the chloroplast"],
-                "explanation": "Chloroplasts contain the pigment chlorophyll"
-            }
-        }
+    def fast_construct(
+        cls,
+        question: str,
+        correct_answer: str,
+        acceptable_answers: Optional[List[str]] = None,
+        explanation: Optional[str] = None
+    ) -> "ShortAnswerQuestion":
+        """Build from trusted, pre-checked data without running validation."""
+        return cls.model_construct(
+            question=question.strip(),
+            correct_answer=correct_answer.strip(),
+            acceptable_answers=acceptable_answers,
+            explanation=explanation
+        )
+    
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        defer_build=True,
+        extra="forbid",
+        frozen=True,
+        str_strip_whitespace=True
+    )
+
+
+# Any test question; pydantic-core dispatches on "kind" instead of trying each type
+TestQuestion = Annotated[
+    Union[MultipleChoiceQuestion, TrueFalseQuestion, ShortAnswerQuestion],
+    Field(discriminator="kind")
+]
+
 
 # ---- Request Models ----
 
@@ -138,49 +204,30 @@ class GenerateRequest(BaseModel):
     """
     Request model for generating flashcards, quizzes, or tests.
     
-    Validates input text length and number of cards requested.
+    Validates input text length and number of cards requested. Text is
+    stripped first, so the length limits apply to the stripped text and
+    surrounding whitespace never counts against MAX_TEXT_LENGTH.
     """
-    text: str
+    text: Annotated[str, StringConstraints(min_length=1, max_length=_MAX_TEXT_LENGTH)]
     mode: Literal["flashcards", "quiz", "test"]
-    num_cards: Optional[int] = None
+    num_cards: int = Field(
+        default=_DEFAULT_FLASHCARD_COUNT,
+        ge=_MIN_FLASHCARD_COUNT,
+        le=_MAX_FLASHCARD_COUNT
+    )
     
-    @field_validator('text')
+    @field_validator("num_cards", mode="before")
     @classmethod
-    def validate_text(cls, v: str) -> str:
-        """Validate text is not empty and within size limits"""
-        if not v or not v.strip():
-            raise ValueError("Text cannot be empty")
-        
-        if len(v) > settings.MAX_TEXT_LENGTH:
-            raise ValueError(
-                f"Text too large. Maximum size is {settings.MAX_TEXT_LENGTH:,} characters (~500KB)"
-            )
-        
-        return v.strip()
+    def _default_num_cards(cls, value):
+        """Treat an explicit null like an omitted num_cards"""
+        return _DEFAULT_FLASHCARD_COUNT if value is None else value
     
-    @field_validator('num_cards')
-    @classmethod
-    def validate_num_cards(cls, v: Optional[int]) -> Optional[int]:
-        """Validate number of cards is within acceptable range"""
-        if v is None:
-            return settings.DEFAULT_FLASHCARD_COUNT
-        
-        if v < settings.MIN_FLASHCARD_COUNT or v > settings.MAX_FLASHCARD_COUNT:
-            raise ValueError(
-                f"Number of cards must be between {settings.MIN_FLASHCARD_COUNT} "
-                f"and {settings.MAX_FLASHCARD_COUNT}"
-            )
-        
-        return v
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "text": "Photosynthesis is the process by which plants use sunlight...",
-                "mode": "flashcards",
-                "num_cards": 5
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        extra="forbid",
+        frozen=True,
+        str_strip_whitespace=True
+    )
 
 
 # ---- Response Models ----
@@ -193,43 +240,40 @@ class FileInfo(BaseModel):
     size_bytes: int
     extracted_chars: int
     processed: bool
+    deduplicated_chunks: int = 0  # Repeated chunks (headers, footers, boilerplate) dropped
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "filename": "biology_notes.pdf",
-                "size_bytes": 245760,
-                "extracted_chars": 12450,
-                "processed": True
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        extra="forbid",
+        frozen=True
+    )
 
 
 class UploadResponse(BaseModel):
     """
     Response from upload endpoint.
-    Contains extracted text, chunks, and optional file metadata.
+    Contains extracted text, chunk offsets into it, and optional file metadata.
+    
+    Chunk strings are only included when explicitly requested; clients
+    normally slice extracted_text[start:end] using chunk_offsets.
     """
     extracted_text: str
-    chunks: List[str]
+    chunk_offsets: List[Tuple[int, int]] = Field(
+        description=(
+            "[start, end) spans into extracted_text, counted in Unicode code points "
+            "(Python str indices), not UTF-16 code units; JavaScript clients must "
+            "slice by code point (e.g. Array.from(text)) for text with emoji or other "
+            "characters outside the Basic Multilingual Plane"
+        )
+    )
+    chunks: Optional[List[str]] = None
     file_info: Optional[FileInfo] = None
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "extracted_text": "Chapter 1: Introduction to Biology...",
-                "chunks": [
-                    "Chapter 1: Introduction to Biology. Biology is...",
-                    "The cell is the basic unit of life..."
-                ],
-                "file_info": {
-                    "filename": "biology_notes.pdf",
-                    "size_bytes": 245760,
-                    "extracted_chars": 12450,
-                    "processed": True
-                }
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        extra="forbid",
+        frozen=True
+    )
 
 
 class GenerateResponse(BaseModel):
@@ -240,22 +284,11 @@ class GenerateResponse(BaseModel):
     flashcards: List[Flashcard]
     summary: str
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "flashcards": [
-                    {
-                        "question": "What is photosynthesis?",
-                        "answer": "The process by which plants convert light energy into chemical energy"
-                    },
-                    {
-                        "question": "Where does photosynthesis occur?",
-                        "answer": "In the chloroplasts of plant cells"
-                    }
-                ],
-                "summary": "Generated 2 flashcards from 150 characters of text"
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        extra="forbid",
+        frozen=True
+    )
 
 class QuizResponse(BaseModel):
     """
@@ -265,56 +298,29 @@ class QuizResponse(BaseModel):
     questions: List[MultipleChoiceQuestion]
     summary: str
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "questions": [
-                    {
-                        "question": "What is the primary function of chloroplasts?",
-                        "options": ["Photosynthesis", "Respiration", "Synthesis", "Replication"],
-                        "correct_answer": "Photosynthesis"
-                    }
-                ],
-                "summary": "Generated 1 quiz question from 150 characters of text"
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        defer_build=True,
+        extra="forbid",
+        frozen=True
+    )
 
 
 class TestResponse(BaseModel):
     """
     Response from test generation.
-    Contains mixed question types: multiple choice, true/false, and short answer.
+    Contains mixed question types: multiple choice, true/false, and short answer,
+    in a single list tagged by each question's "kind".
     """
-    multiple_choice: List[MultipleChoiceQuestion]
-    true_false: List[TrueFalseQuestion]
-    short_answer: List[ShortAnswerQuestion]
+    questions: List[TestQuestion]
     summary: str
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "multiple_choice": [
-                    {
-                        "question": "What is the primary function of chloroplasts?",
-                        "options": ["Photosynthesis", "Respiration", "Synthesis", "Replication"],
-                        "correct_answer": "Photosynthesis"
-                    }
-                ],
-                "true_false": [
-                    {
-                        "question": "Photosynthesis only occurs during daytime.",
-                        "correct_answer": True
-                    }
-                ],
-                "short_answer": [
-                    {
-                        "question": "What organelle is responsible for photosynthesis?",
-                        "correct_answer": "chloroplast"
-                    }
-                ],
-                "summary": "Generated test with 3 question types from 150 characters of text"
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        defer_build=True,
+        extra="forbid",
+        frozen=True
+    )
 
 class HealthResponse(BaseModel):
     """
@@ -325,14 +331,11 @@ class HealthResponse(BaseModel):
     version: str
     ollama_configured: bool
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "healthy",
-                "version": "0.1.0",
-                "ollama_configured": True
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        extra="forbid",
+        frozen=True
+    )
 
 
 # ---- Error Response Models ----
@@ -346,17 +349,12 @@ class ErrorDetail(BaseModel):
     message: str
     details: Optional[dict] = None
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "code": "INVALID_FILE_TYPE",
-                "message": "Only PDF files are supported",
-                "details": {
-                    "allowed_types": [".pdf"],
-                    "received_type": ".docx"
-                }
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        defer_build=True,
+        extra="forbid",
+        frozen=True
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -365,43 +363,47 @@ class ErrorResponse(BaseModel):
     """
     error: ErrorDetail
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "error": {
-                    "code": "INVALID_FILE_TYPE",
-                    "message": "Only PDF files are supported"
-                }
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=_add_example,
+        defer_build=True,
+        extra="forbid",
+        frozen=True
+    )
 
 
 # ---- Internal Models (for service layer) ----
 
-class TextProcessingResult(BaseModel):
+# Plain slotted dataclasses: these never see untrusted input, so they
+# skip pydantic validation on every hand-off between services.
+
+@dataclass(frozen=True, slots=True)
+class TextStats:
+    """
+    Basic statistics about a processed text.
+    """
+    char_count: int
+    word_count: int
+    sentence_count: int
+
+
+@dataclass(frozen=True, slots=True)
+class TextProcessingResult:
     """
     Internal model for text processing results.
     Used by services to pass data between layers.
     """
     text: str
-    chunks: List[str]
-    stats: dict
+    chunk_offsets: List[Tuple[int, int]]  # [start, end) spans into text
+    stats: TextStats
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "text": "Full extracted text...",
-                "chunks": ["Chunk 1...", "Chunk 2..."],
-                "stats": {
-                    "char_count": 5000,
-                    "word_count": 850,
-                    "sentence_count": 42
-                }
-            }
-        }
+    def get_chunk(self, index: int) -> str:
+        """Slice a single chunk out of text on demand"""
+        start, end = self.chunk_offsets[index]
+        return self.text[start:end]
 
 
-class LLMGenerationRequest(BaseModel):
+@dataclass(frozen=True, slots=True)
+class LLMGenerationRequest:
     """
     Internal model for LLM generation requests.
     Used by LLM service to structure generation calls.
@@ -410,20 +412,36 @@ class LLMGenerationRequest(BaseModel):
     num_items: int
     generation_type: Literal["flashcards", "quiz", "test"]
     max_text_length: int = 5000  # Limit sent to LLM
+    _truncated_text: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        # Slice once up front; short text is shared rather than copied
+        truncated = self.text if len(self.text) <= self.max_text_length else self.text[:self.max_text_length]
+        object.__setattr__(self, "_truncated_text", truncated)
     
     def get_truncated_text(self) -> str:
         """Get text truncated to max_text_length"""
-        if len(self.text) <= self.max_text_length:
-            return self.text
-        return self.text[:self.max_text_length]
+        return self._truncated_text
 
 
 # ---- Validation Helpers ----
 
+# Built once per process so callers validate a whole list in a single
+# pydantic-core call instead of creating ad-hoc adapters per request.
+# The question adapters follow their models' defer_build and compile on first use.
+FLASHCARDS_ADAPTER = TypeAdapter(List[Flashcard])
+MCQS_ADAPTER = TypeAdapter(List[MultipleChoiceQuestion], config=ConfigDict(defer_build=True))
+TF_ADAPTER = TypeAdapter(List[TrueFalseQuestion], config=ConfigDict(defer_build=True))
+SA_ADAPTER = TypeAdapter(List[ShortAnswerQuestion], config=ConfigDict(defer_build=True))
+
+
 def validate_flashcard_list(flashcards: List[dict]) -> List[Flashcard]:
     """
     Validate and convert a list of dictionaries to Flashcard objects.
     
+    The whole list is validated in a single pydantic-core call; invalid
+    items are dropped (and reported) only if that call fails.
+    
     Args:
         flashcards: List of flashcard dictionaries
         
@@ -433,17 +451,19 @@ def validate_flashcard_list(flashcards: List[dict]) -> List[Flashcard]:
     Raises:
         ValueError: If any flashcard is invalid
     """
-    validated = []
-    errors = []
+    try:
+        return FLASHCARDS_ADAPTER.validate_python(flashcards)
+    except ValidationError as e:
+        # Group error messages by the index of the failing item
+        failures = {}
+        for error in e.errors():
+            index = error["loc"][0] if error["loc"] else 0
+            failures.setdefault(index, []).append(error["msg"])
     
-    for i, card_data in enumerate(flashcards):
-        try:
-            card = Flashcard(**card_data)
-            validated.append(card)
-        except Exception as e:
-            errors.append(f"Flashcard {i}: {str(e)}")
+    errors = [f"Flashcard {i}: {'; '.join(messages)}" for i, messages in sorted(failures.items())]
+    valid_items = [card_data for i, card_data in enumerate(flashcards) if i not in failures]
     
-    if errors and not validated:
+    if not valid_items:
         raise ValueError(f"All flashcards invalid: {'; '.join(errors)}")
     
-    return validated
\ No newline at end of file
+    return FLASHCARDS_ADAPTER.validate_python(valid_items)
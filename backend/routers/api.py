@@ -0,0 +1,196 @@
+"""
+API routes for AI-Learning API.
+Upload, generation, and health endpoints, mounted by main.py.
+"""
+
+from fastapi import APIRouter, UploadFile, File, Form, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import hashlib
+import logging
+
+from config import settings
+from models import (
+    GenerateRequest,
+    UploadResponse,
+    GenerateResponse,
+    HealthResponse,
+    ErrorDetail,
+    ErrorResponse,
+)
+from services.pdf_service import PDFService
+from services.llm_service import get_llm_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# ---- Initialize Services ----
+pdf_service = PDFService()
+llm_service = get_llm_service()
+
+
+# ---- Helpers ----
+
+def _generation_etag(text: str, num_cards: int) -> str:
+    """Build a weak ETag identifying a generation request's inputs."""
+    digest = hashlib.blake2b(
+        f"{settings.OLLAMA_MODEL}|{num_cards}|{text}".encode("utf-8"),
+        digest_size=8
+    ).hexdigest()
+    return f'W/"{digest}-{num_cards}"'
+
+
+# ---- API Endpoints ----
+# Response bodies are built from already-validated data with model_construct.
+# FastAPI passes returned instances of the response_model through without
+# re-validating them, so each response is serialized without any validation.
+# With a response_model and the default response class, FastAPI dumps the
+# model straight to JSON bytes in pydantic-core; a custom class such as
+# ORJSONResponse would force a model_dump() dict round trip first.
+
+@router.get("/health", response_model=HealthResponse)
+async def health_check(response: Response):
+    """
+    Check if the API is running and properly configured.
+    """
+    response.headers["Cache-Control"] = "public, max-age=30"
+    return HealthResponse.model_construct(
+        status="healthy",
+        version=settings.API_VERSION,
+        ollama_configured=bool(settings.OLLAMA_API_KEY)
+    )
+
+
+@router.post("/upload", response_model=UploadResponse, response_model_exclude_none=True)
+async def upload(
+    file: Optional[UploadFile] = File(default=None),
+    text: Optional[str] = Form(default=None),
+    include_chunks: bool = Query(default=False)
+):
+    """
+    Upload a PDF file or provide text directly for processing.
+    
+    - **file**: PDF file to extract text from (max configurable MB)
+    - **text**: Direct text input (max configurable characters)
+    - **include_chunks**: Also return chunk strings (defaults to offsets only)
+    
+    Returns extracted text with (start, end) offsets of manageable chunks.
+    """
+    logger.info(f"Upload request received - file: {file.filename if file else 'none'}, text_length: {len(text) if text else 0}")
+    
+    # Validate that at least one input is provided
+    if file is None and (text is None or text.strip() == ""):
+        raise HTTPException(
+            status_code=400,
+            detail="Please provide either a PDF file or text input"
+        )
+    
+    # Process based on input type
+    if file is not None:
+        # Process uploaded PDF
+        extracted_text, file_info = await pdf_service.validate_and_process_upload(file)
+    else:
+        # Process direct text input
+        extracted_text = pdf_service.process_text_input(text)
+        file_info = None
+    
+    # Chunk the text off the event loop (offsets only - the client already has extracted_text)
+    chunk_offsets, duplicate_chunks = await asyncio.to_thread(pdf_service.chunk_spans_safely, extracted_text)
+    if file_info is not None:
+        file_info = file_info.model_copy(update={"deduplicated_chunks": duplicate_chunks})
+    chunks = None
+    if include_chunks:
+        chunks = [extracted_text[start:end] for start, end in chunk_offsets]
+    
+    return UploadResponse.model_construct(
+        extracted_text=extracted_text,
+        chunk_offsets=chunk_offsets,
+        chunks=chunks,
+        file_info=file_info
+    )
+
+
+@router.post("/generate", response_model=GenerateResponse)
+async def generate(req: GenerateRequest, request: Request, response: Response):
+    """
+    Generate flashcards, quizzes, or tests from provided text.
+    
+    - **text**: Source text for generation (max configurable characters)
+    - **mode**: Type of content to generate (currently only "flashcards" supported)
+    - **num_cards**: Number of flashcards to generate (configurable range)
+    
+    Returns a list of generated flashcards with questions and answers.
+    Responses carry an ETag; repeating a request with a matching
+    If-None-Match header returns 304 Not Modified without regenerating.
+    """
+    logger.info(f"Generate request - mode: {req.mode}, text_length: {len(req.text)}, num_cards: {req.num_cards}")
+    
+    # Check if mode is supported
+    if req.mode != "flashcards":
+        raise HTTPException(
+            status_code=501,
+            detail=f"'{req.mode}' mode is not yet implemented. Currently only 'flashcards' mode is supported."
+        )
+    
+    # Let clients that already hold this result skip regeneration
+    etag = _generation_etag(req.text, req.num_cards)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    # Generate flashcards using LLM service
+    try:
+        flashcards = await llm_service.generate_flashcards(req.text, num_cards=req.num_cards)
+        logger.info(f"Successfully generated {len(flashcards)} flashcards")
+    except ValueError as e:
+        logger.error(f"Flashcard generation failed: {str(e)}")
+        raise HTTPException(
+            status_code=422,
+            detail=f"Failed to generate flashcards: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error during generation: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while generating flashcards. Please try again."
+        )
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=300"
+    
+    return GenerateResponse.model_construct(
+        flashcards=flashcards,
+        summary=f"Generated {len(flashcards)} flashcards from {len(req.text)} characters of text"
+    )
+
+
+@router.post("/generate/stream")
+async def generate_stream(req: GenerateRequest):
+    """
+    Stream flashcards as newline-delimited JSON while they are generated.
+    
+    Accepts the same body as /generate. Each line is one flashcard object
+    ({"question", "answer"}) emitted as soon as the model completes it.
+    If generation fails mid-stream, a final {"error": ...} line is sent.
+    """
+    logger.info(f"Generate stream request - mode: {req.mode}, text_length: {len(req.text)}, num_cards: {req.num_cards}")
+    
+    # Check if mode is supported
+    if req.mode != "flashcards":
+        raise HTTPException(
+            status_code=501,
+            detail=f"'{req.mode}' mode is not yet implemented. Currently only 'flashcards' mode is supported."
+        )
+    
+    async def ndjson_lines():
+        try:
+            async for flashcard in llm_service.stream_flashcards(req.text, num_cards=req.num_cards):
+                yield flashcard.model_dump_json() + "\n"
+        except ValueError as e:
+            logger.error(f"Flashcard streaming failed: {str(e)}")
+            error = ErrorResponse(error=ErrorDetail(code="GENERATION_FAILED", message=str(e)))
+            yield error.model_dump_json(exclude_none=True) + "\n"
+    
+    # Not compressed (see main.py), so each line reaches the client as soon as it is sent
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
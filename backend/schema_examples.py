@@ -0,0 +1,123 @@
+"""
+OpenAPI examples for the API models.
+
+Imported only when a JSON schema is generated (e.g. /docs or /openapi.json),
+so request handling never builds these dicts.
+"""
+
+EXAMPLES = {
+    "Flashcard": {
+        "question": "What is photosynthesis?",
+        "answer": "The process by which plants convert light energy into chemical energy"
+    },
+    "MultipleChoiceQuestion": {
+        "kind": "mcq",
+        "question": "What is the primary function of chloroplasts?",
+        "options": [
+            "Photosynthesis",
+            "Cellular respiration",
+            "Protein synthesis",
+            "DNA replication"
+        ],
+        "correct_answer": "Photosynthesis",
+        "explanation": "Chloroplasts contain chlorophyll and are responsible for photosynthesis"
+    },
+    "TrueFalseQuestion": {
+        "kind": "tf",
+        "question": "Photosynthesis only occurs during daytime.",
+        "correct_answer": True,
+        "explanation": "Photosynthesis requires sunlight, so it only occurs during the day"
+    },
+    "ShortAnswerQuestion": {
+        "kind": "sa",
+        "question": "What organelle is responsible for photosynthesis?",
+        "correct_answer": "chloroplast",
+        "acceptable_answers": ["chloroplasts", "the chloroplast"],
+        "explanation": "Chloroplasts contain the pigment chlorophyll"
+    },
+    "GenerateRequest": {
+        "text": "Photosynthesis is the process by which plants use sunlight...",
+        "mode": "flashcards",
+        "num_cards": 5
+    },
+    "FileInfo": {
+        "filename": "biology_notes.pdf",
+        "size_bytes": 245760,
+        "extracted_chars": 12450,
+        "processed": True,
+        "deduplicated_chunks": 2
+    },
+    "UploadResponse": {
+        "extracted_text": "Chapter 1: Introduction to Biology...",
+        "chunk_offsets": [[0, 1980], [1981, 3950]],
+        "file_info": {
+            "filename": "biology_notes.pdf",
+            "size_bytes": 245760,
+            "extracted_chars": 12450,
+            "processed": True
+        }
+    },
+    "GenerateResponse": {
+        "flashcards": [
+            {
+                "question": "What is photosynthesis?",
+                "answer": "The process by which plants convert light energy into chemical energy"
+            },
+            {
+                "question": "Where does photosynthesis occur?",
+                "answer": "In the chloroplasts of plant cells"
+            }
+        ],
+        "summary": "Generated 2 flashcards from 150 characters of text"
+    },
+    "QuizResponse": {
+        "questions": [
+            {
+                "question": "What is the primary function of chloroplasts?",
+                "options": ["Photosynthesis", "Respiration", "Synthesis", "Replication"],
+                "correct_answer": "Photosynthesis"
+            }
+        ],
+        "summary": "Generated 1 quiz question from 150 characters of text"
+    },
+    "TestResponse": {
+        "questions": [
+            {
+                "kind": "mcq",
+                "question": "What is the primary function of chloroplasts?",
+                "options": ["Photosynthesis", "Respiration", "Synthesis", "Replication"],
+                "correct_answer": "Photosynthesis"
+            },
+            {
+                "kind": "tf",
+                "question": "Photosynthesis only occurs during daytime.",
+                "correct_answer": True
+            },
+            {
+                "kind": "sa",
+                "question": "What organelle is responsible for photosynthesis?",
+                "correct_answer": "chloroplast"
+            }
+        ],
+        "summary": "Generated test with 3 question types from 150 characters of text"
+    },
+    "HealthResponse": {
+        "status": "healthy",
+        "version": "0.1.0",
+        "ollama_configured": True
+    },
+    "ErrorDetail": {
+        "code": "INVALID_FILE_TYPE",
+        "message": "Only PDF files are supported",
+        "details": {
+            "allowed_types": [".pdf"],
+            "received_type": ".docx"
+        }
+    },
+    "ErrorResponse": {
+        "error": {
+            "code": "INVALID_FILE_TYPE",
+            "message": "Only PDF files are supported"
+        }
+    }
+}
@@ -0,0 +1,86 @@
+"""
+Semantic response cache for AI-Learning API.
+Reuses generated flashcards for texts that are near-duplicates of one
+already generated (e.g. the same course material with small edits).
+"""
+
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Sequence, Tuple
+import math
+import operator
+import threading
+
+from models import Flashcard
+
+
+def _normalize(vector: Sequence[float]) -> Tuple[float, ...]:
+    """Scale a vector to unit length so a dot product is its cosine similarity."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return ()
+    return tuple(x / norm for x in vector)
+
+
+class SemanticCache:
+    """
+    Bounded LRU of generated flashcards, matched by embedding similarity.
+    
+    Entries are only matched against requests for the same number of cards.
+    Lookups are a linear scan, which is fine for the few hundred entries a
+    single worker keeps.
+    """
+    
+    def __init__(self, max_entries: int, threshold: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[float, ...], int, Tuple[Flashcard, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, embedding: Sequence[float], num_cards: int) -> Optional[List[Flashcard]]:
+        """
+        Return flashcards of the most similar cached text, if similar enough.
+        
+        Args:
+            embedding: Embedding of the requested text
+            num_cards: Number of flashcards requested
+        
+        Returns:
+            Cached flashcards, or None if no entry reaches the threshold
+        """
+        query = _normalize(embedding)
+        if not query:
+            return None
+        
+        best_key, best_score = None, self.threshold
+        with self._lock:
+            for key, (vector, cards, _) in self._entries.items():
+                if cards != num_cards or len(vector) != len(query):
+                    continue
+                score = sum(map(operator.mul, vector, query))
+                if score >= best_score:
+                    best_key, best_score = key, score
+            
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            return list(self._entries[best_key][2])
+    
+    def put(self, key: Hashable, embedding: Sequence[float], num_cards: int, flashcards: List[Flashcard]) -> None:
+        """
+        Store flashcards generated for a text, evicting the least recently used entry.
+        
+        Args:
+            key: Exact-match cache key of the text (replaces any previous entry)
+            embedding: Embedding of the text
+            num_cards: Number of flashcards that were requested
+            flashcards: Generated flashcards
+        """
+        vector = _normalize(embedding)
+        if not vector or self.max_entries <= 0:
+            return
+        
+        with self._lock:
+            self._entries[key] = (vector, num_cards, tuple(flashcards))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -3,34 +3,257 @@ LLM service for AI-Learning API.
 Handles all interactions with Ollama cloud for flashcard generation.
 """
 
-from typing import List
+from collections import OrderedDict
+from functools import lru_cache
+from pydantic import ValidationError
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Tuple
+import asyncio
+import hashlib
 import json
-import re
 import logging
+import random
+import re
+import threading
 
-from ollama import Client
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    _json_loads = json.loads
 
 from config import settings
-from models import Flashcard, MultipleChoiceQuestion, TrueFalseQuestion, ShortAnswerQuestion
+from models import FLASHCARDS_ADAPTER, Flashcard, MultipleChoiceQuestion, TrueFalseQuestion, ShortAnswerQuestion
+from services.cache_service import SemanticCache
+from utils.text_utils import chunk_text, dedupe_chunks
+
+if TYPE_CHECKING:
+    from ollama import AsyncClient
 
 logger = logging.getLogger(__name__)
 
+# ---- Prompt Templates ----
+_MAX_PROMPT_TEXT_CHARS = settings.MAX_PROMPT_TEXT_CHARS
+
+_WHITESPACE_RUN_RE = re.compile(r"\s+")
+
+# Characters that affect bracket matching when scanning for a JSON block
+_JSON_STRUCTURE_RE = re.compile(r'[\\"\[\]{}]')
+
+# Instructions are sent verbatim as the system message and everything that
+# varies per call goes in the user message, so the prompt prefix is
+# byte-identical across calls and providers can reuse their prompt cache.
+_FLASHCARD_SYSTEM_PROMPT = """You generate educational flashcards from the text you are given, producing exactly the number of flashcards requested.
+
+IMPORTANT: Return ONLY a JSON object with a "flashcards" array. Each item must have exactly two fields:
+- "question": A clear, specific question
+- "answer": A concise, accurate answer
+
+Format example:
+{"flashcards": [
+  {"question": "What is...", "answer": "It is..."},
+  {"question": "How does...", "answer": "It works by..."}
+]}"""
+
+_FLASHCARD_PROMPT_TEMPLATE = """Generate exactly {num_cards} flashcards from:
+{text}
+"""
+
+# Structured-output schema passed as Ollama's `format` so the model returns pure JSON
+_FLASHCARD_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "flashcards": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "question": {"type": "string"},
+                    "answer": {"type": "string"}
+                },
+                "required": ["question", "answer"]
+            }
+        }
+    },
+    "required": ["flashcards"]
+}
+
+_BATCH_SYSTEM_PROMPT = """You generate educational flashcards for each of several numbered documents you are given.
+
+IMPORTANT: Return ONLY a JSON object keyed by document number. Each value is an array of flashcards, and each flashcard must have exactly two fields:
+- "question": A clear, specific question
+- "answer": A concise, accurate answer
+
+Generate exactly the number of flashcards requested for each document, using only that document's text.
+
+Format example:
+{"1": [{"question": "What is...", "answer": "It is..."}],
+ "2": [{"question": "How does...", "answer": "It works by..."}]}"""
+
+_BATCH_PROMPT_TEMPLATE = """Generate flashcards for each of these {num_docs} documents:
+
+{documents}"""
+
+_BATCH_DOCUMENT_TEMPLATE = """Document {doc_id} (generate exactly {num_cards} flashcards):
+{text}
+"""
+
+
+# ---- Retry / Adaptive Batching ----
+# Status codes worth retrying a single call on (overload or upstream hiccup)
+_RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Status codes that suggest a batched call was too large for the backend
+_BATCH_SHRINK_STATUS_CODES = frozenset({413, 500, 503})
+
+# Consecutive successful batches before the batch size is grown again
+_BATCH_GROWTH_STREAK = 20
+
+_RETRY_BASE_DELAY_SECONDS = 0.5
+
+
+def _is_transient_error(error: BaseException, status_codes: frozenset = _RETRYABLE_STATUS_CODES) -> bool:
+    """Whether an Ollama call failed due to a timeout, dropped connection, or one of status_codes."""
+    import httpx
+    
+    if isinstance(error, (httpx.TimeoutException, httpx.NetworkError, ConnectionError)):
+        return True
+    return getattr(error, "status_code", None) in status_codes
+
+
+@lru_cache(maxsize=32)
+def _batch_response_schema(num_docs: int) -> dict:
+    """Structured-output schema for a batched prompt covering num_docs documents."""
+    cards = _FLASHCARD_RESPONSE_SCHEMA["properties"]["flashcards"]
+    keys = [str(i) for i in range(1, num_docs + 1)]
+    return {
+        "type": "object",
+        "properties": {key: cards for key in keys},
+        "required": keys
+    }
+
+
+def _fit_prompt_text(text: str) -> str:
+    """
+    Compact source text to fit the prompt budget.
+    
+    Runs of whitespace are collapsed before truncating so indentation and
+    blank lines don't use up the budget. The cut is moved back to the last
+    sentence end in the second half of the budget, or failing that the last
+    word boundary, so the model never sees a half-sentence or half-word
+    (which tends to tokenize into several junk tokens).
+    """
+    compact = _WHITESPACE_RUN_RE.sub(" ", text).strip()
+    if len(compact) <= _MAX_PROMPT_TEXT_CHARS:
+        return compact
+    
+    # One extra character shows whether the last word or sentence is complete
+    window = compact[:_MAX_PROMPT_TEXT_CHARS + 1]
+    sentence_end = max(window.rfind(". "), window.rfind("! "), window.rfind("? "))
+    if sentence_end >= _MAX_PROMPT_TEXT_CHARS // 2:
+        return window[:sentence_end + 1]
+    
+    boundary = window.rfind(" ")
+    return window[:boundary] if boundary > 0 else window[:_MAX_PROMPT_TEXT_CHARS]
+
+
+@lru_cache(maxsize=128)
+def _render_flashcard_prompt(num_cards: int, text: str) -> str:
+    """
+    Render the flashcard prompt template.
+    
+    Cached so regenerating cards for the same (already truncated) source
+    text reuses the rendered prompt string.
+    """
+    return _FLASHCARD_PROMPT_TEMPLATE.format(num_cards=num_cards, text=text)
+
+
+def _chat_messages(system_prompt: str, prompt: str) -> List[dict]:
+    """Build chat messages with the static instructions ahead of the per-call prompt."""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt}
+    ]
+
+
+@lru_cache(maxsize=1)
+def get_ollama_client() -> "AsyncClient":
+    """
+    Get or create the shared Ollama client.
+    
+    The client is built once per process so its HTTP connection pool
+    (and any keep-alive TCP/TLS sessions to the Ollama host) is reused
+    across requests instead of being rebuilt on every call. The ollama
+    package is imported here rather than at module load to keep it off
+    the startup path.
+    
+    Returns:
+        Ollama client instance
+    """
+    import httpx
+    from ollama import AsyncClient
+    
+    return AsyncClient(
+        host=settings.OLLAMA_HOST,
+        headers=settings.ollama_headers,
+        timeout=settings.OLLAMA_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.OLLAMA_MAX_CONCURRENCY,
+            max_keepalive_connections=settings.OLLAMA_MAX_CONCURRENCY
+        )
+    )
+
+
+async def close_ollama_client() -> None:
+    """Close the shared Ollama client's connection pool, if it was created."""
+    if get_ollama_client.cache_info().currsize:
+        await get_ollama_client().close()
+        get_ollama_client.cache_clear()
+
 
 class LLMService:
     """Service for interacting with Language Learning Models (Ollama)."""
     
     def __init__(self):
-        """Initialize the LLM service with Ollama client."""
-        self.client = Client(
-            host=settings.OLLAMA_HOST,
-            headers=settings.ollama_headers
-        )
+        """Initialize the LLM service (the Ollama client is created on first use)."""
+        self._client: Optional["AsyncClient"] = None
         self.model = settings.OLLAMA_MODEL
+        
+        # Bounded LRU of generated flashcards keyed by (normalized text hash, num_cards)
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[Flashcard, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Second tier: near-duplicate texts matched by embedding (opt-in via OLLAMA_EMBED_MODEL)
+        self._semantic_cache: Optional[SemanticCache] = None
+        if settings.OLLAMA_EMBED_MODEL and settings.FLASHCARD_CACHE_SIZE > 0:
+            self._semantic_cache = SemanticCache(settings.FLASHCARD_CACHE_SIZE, settings.SEMANTIC_CACHE_THRESHOLD)
+        
+        # Caps in-flight Ollama requests so bursts don't stampede the backend
+        self._request_semaphore = asyncio.Semaphore(settings.OLLAMA_MAX_CONCURRENCY)
+        
+        # Request coalescing (see _submit_to_batch); created on first use
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_tasks: set = set()
+        
+        # Adaptive batch size (AIMD): halved on overload, grown back after a success streak
+        self._batch_size = settings.OLLAMA_BATCH_SIZE
+        self._batch_success_streak = 0
     
-    def generate_flashcards(self, text: str, num_cards: int = None) -> List[Flashcard]:
+    @property
+    def client(self) -> "AsyncClient":
+        """Shared Ollama client, created lazily on first generation."""
+        if self._client is None:
+            self._client = get_ollama_client()
+        return self._client
+    
+    async def generate_flashcards(self, text: str, num_cards: int = None) -> List[Flashcard]:
         """
         Generate flashcards from provided text using Ollama.
         
+        Text longer than a single prompt is split on sentence boundaries and
+        up to MAX_GENERATION_CHUNKS chunks are sent to the model concurrently,
+        with the requested card count spread across them.
+        
         Args:
             text: Source text to generate flashcards from
             num_cards: Number of flashcards to generate (uses default if None)
@@ -44,23 +267,42 @@ class LLMService:
         if num_cards is None:
             num_cards = settings.DEFAULT_FLASHCARD_COUNT
         
+        cache_key = self._make_cache_key(self.model, text, num_cards)
+        cached = self._get_cached_flashcards(cache_key)
+        if cached is not None:
+            logger.info(f"Returning {len(cached)} cached flashcards for {len(text)} characters")
+            return cached
+        
+        embedding = await self._embed_for_cache(text)
+        if embedding is not None:
+            similar = self._semantic_cache.get(embedding, num_cards)
+            if similar is not None:
+                logger.info(f"Returning {len(similar)} cached flashcards from a similar text")
+                self._store_cached_flashcards(cache_key, similar)
+                return similar
+        
         logger.info(f"Generating {num_cards} flashcards from {len(text)} characters")
         
         try:
-            # Build the prompt
-            prompt = self._build_flashcard_prompt(text, num_cards)
+            chunks = self._select_chunks(text, num_cards)
+            counts = self._distribute_cards(num_cards, len(chunks))
             
-            # Call Ollama API
-            response_text = self._call_ollama_api(prompt)
+            # Generate for every chunk concurrently
+            results = await asyncio.gather(
+                *(self._generate_for_chunk(chunk, count) for chunk, count in zip(chunks, counts)),
+                return_exceptions=True
+            )
             
-            # Parse and validate response
-            flashcards = self._parse_flashcard_response(response_text)
+            flashcards = self._merge_chunk_results(results, num_cards)
             
             # Validate we got flashcards
             if len(flashcards) == 0:
                 raise ValueError("No flashcards were generated. The AI response was empty or invalid.")
             
-            logger.info(f"Successfully generated {len(flashcards)} flashcards")
+            logger.info(f"Successfully generated {len(flashcards)} flashcards from {len(chunks)} chunk(s)")
+            self._store_cached_flashcards(cache_key, flashcards)
+            if embedding is not None:
+                self._semantic_cache.put(cache_key, embedding, num_cards, flashcards)
             return flashcards
             
         except ValueError:
@@ -69,9 +311,437 @@ class LLMService:
             logger.error(f"Unexpected error in flashcard generation: {str(e)}", exc_info=True)
             raise ValueError(f"Flashcard generation failed: {str(e)}")
     
+    async def generate_flashcards_batch(self, texts: List[str], num_cards: int = None) -> List[List[Flashcard]]:
+        """
+        Generate flashcards for several independent texts concurrently.
+        
+        Each text is handled like a separate generate_flashcards call; the
+        shared semaphore still caps in-flight Ollama requests.
+        
+        Args:
+            texts: Source texts to generate flashcards from
+            num_cards: Number of flashcards per text (uses default if None)
+            
+        Returns:
+            One list of flashcards per input text, in order
+            
+        Raises:
+            ValueError: If generation fails for any text
+        """
+        return list(await asyncio.gather(*(self.generate_flashcards(text, num_cards) for text in texts)))
+    
+    async def stream_flashcards(self, text: str, num_cards: int = None) -> AsyncIterator[Flashcard]:
+        """
+        Generate flashcards, yielding each one as soon as the model finishes it.
+        
+        Streams the model output through an incremental JSON parser instead
+        of waiting for the full response. Uses the first prompt-sized chunk
+        of the text.
+        
+        Args:
+            text: Source text to generate flashcards from
+            num_cards: Number of flashcards to generate (uses default if None)
+            
+        Yields:
+            Validated Flashcard objects, at most num_cards
+            
+        Raises:
+            ValueError: If the AI service call fails or yields no flashcards
+        """
+        if num_cards is None:
+            num_cards = settings.DEFAULT_FLASHCARD_COUNT
+        
+        logger.info(f"Streaming {num_cards} flashcards from {len(text)} characters")
+        
+        prompt = self._build_flashcard_prompt(self._select_chunks(text, 1)[0], num_cards)
+        messages = _chat_messages(_FLASHCARD_SYSTEM_PROMPT, prompt)
+        
+        # The model stream is read by a separate task so the concurrency slot
+        # is released as soon as generation ends, however slowly our own
+        # client consumes the flashcards (at most num_cards are ever queued)
+        queue: "asyncio.Queue[Optional[Flashcard]]" = asyncio.Queue()
+        reader = asyncio.create_task(self._read_flashcard_stream(messages, num_cards, queue))
+        reader.add_done_callback(lambda _: queue.put_nowait(None))
+        emitted = 0
+        
+        try:
+            while (flashcard := await queue.get()) is not None:
+                emitted += 1
+                yield flashcard
+            reader.result()
+        except Exception as e:
+            logger.error(f"Ollama streaming call failed: {str(e)}")
+            raise ValueError(f"Failed to communicate with AI service: {str(e)}")
+        finally:
+            # Stops the upstream stream if our client went away early
+            reader.cancel()
+        
+        if emitted == 0:
+            raise ValueError("No flashcards were generated. The AI response was empty or invalid.")
+    
+    async def _read_flashcard_stream(
+        self,
+        messages: List[dict],
+        num_cards: int,
+        queue: "asyncio.Queue[Optional[Flashcard]]"
+    ) -> None:
+        """
+        Stream a model response, queueing each new flashcard as it completes.
+        
+        Holds a request slot only while the upstream stream is open, and
+        closes that stream as soon as num_cards flashcards have been parsed.
+        
+        Args:
+            messages: Chat messages to send
+            num_cards: Number of flashcards to stop after
+            queue: Receives validated, de-duplicated flashcards
+        """
+        parser = _FlashcardStreamParser()
+        seen_questions = set()
+        queued = 0
+        
+        async with self._request_semaphore:
+            stream = await self.client.chat(
+                self.model,
+                messages=messages,
+                stream=True,
+                format=_FLASHCARD_RESPONSE_SCHEMA,
+                options={"temperature": settings.OLLAMA_TEMPERATURE}
+            )
+            try:
+                async for part in stream:
+                    for item in parser.feed(part["message"]["content"]):
+                        flashcard = self._to_flashcard(item)
+                        if flashcard is None or flashcard.question.lower() in seen_questions:
+                            continue
+                        seen_questions.add(flashcard.question.lower())
+                        queue.put_nowait(flashcard)
+                        queued += 1
+                        if queued >= num_cards:
+                            return
+            finally:
+                await stream.aclose()
+    
+    async def _generate_for_chunk(self, text: str, num_cards: int) -> List[Flashcard]:
+        """
+        Generate flashcards for a single prompt-sized chunk of text.
+        
+        Args:
+            text: Chunk of source text
+            num_cards: Number of flashcards to request for this chunk
+            
+        Returns:
+            List of validated Flashcard objects
+        """
+        if settings.OLLAMA_BATCH_WINDOW_MS > 0 and settings.OLLAMA_BATCH_SIZE > 1:
+            return await self._submit_to_batch(text, num_cards)
+        return await self._generate_single(text, num_cards)
+    
+    async def _generate_single(self, text: str, num_cards: int) -> List[Flashcard]:
+        """Generate flashcards for one chunk with its own Ollama call."""
+        prompt = self._build_flashcard_prompt(text, num_cards)
+        response_text = await self._call_ollama_api(prompt)
+        return self._parse_flashcard_response(response_text)
+    
+    async def _submit_to_batch(self, text: str, num_cards: int) -> List[Flashcard]:
+        """
+        Queue a chunk for coalesced generation and wait for its flashcards.
+        
+        Chunks submitted within OLLAMA_BATCH_WINDOW_MS of each other (from
+        the same request or from concurrent ones) are sent to the model as
+        a single prompt, so the instructions and format example are only
+        paid for once per batch.
+        """
+        loop = asyncio.get_running_loop()
+        if self._batch_queue is None or self._batch_loop is not loop:
+            self._batch_queue = asyncio.Queue()
+            self._batch_loop = loop
+            self._spawn_batch_task(self._run_batch_worker(self._batch_queue))
+        
+        future = loop.create_future()
+        await self._batch_queue.put((text, num_cards, future))
+        return await future
+    
+    async def shutdown_batching(self) -> None:
+        """Stop the batch worker and any in-flight batches, cancelling queued chunks."""
+        tasks = list(self._batch_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if self._batch_queue is not None:
+            while not self._batch_queue.empty():
+                _, _, future = self._batch_queue.get_nowait()
+                future.cancel()
+        self._batch_queue = None
+        self._batch_loop = None
+    
+    def _spawn_batch_task(self, coro) -> None:
+        """Run a background task, holding a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _run_batch_worker(self, queue: asyncio.Queue) -> None:
+        """Collect queued chunks into batches and dispatch each batch."""
+        loop = asyncio.get_running_loop()
+        window = settings.OLLAMA_BATCH_WINDOW_MS / 1000
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + window
+            
+            while len(batch) < self._batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Dispatch without blocking collection of the next batch
+            self._spawn_batch_task(self._process_batch(batch))
+    
+    async def _process_batch(self, batch: List[Tuple[str, int, asyncio.Future]]) -> None:
+        """
+        Generate flashcards for a batch and resolve each waiting future.
+        
+        If the batched call times out or the backend reports overload, the
+        batch size is halved and each half is retried as its own batch.
+        Documents the batched call did not produce cards for (or the whole
+        batch, on any other failure) fall back to individual calls, so a
+        bad batch never fails a request that would have succeeded on its own.
+        """
+        results: List[Optional[List[Flashcard]]] = [None] * len(batch)
+        # Only a multi-document call that worked says anything about the batch size
+        batch_succeeded = False
+        
+        if len(batch) > 1:
+            try:
+                results = await self._generate_batched([(text, n) for text, n, _ in batch])
+                batch_succeeded = True
+            except Exception as e:
+                if _is_transient_error(e.__cause__ or e, _BATCH_SHRINK_STATUS_CODES):
+                    self._shrink_batch_size(len(batch))
+                    middle = len(batch) // 2
+                    await asyncio.gather(self._process_batch(batch[:middle]), self._process_batch(batch[middle:]))
+                    return
+                logger.warning(f"Batched generation of {len(batch)} documents failed, retrying individually: {str(e)}")
+        
+        resolved = await asyncio.gather(*(
+            self._resolve_batch_item(future, text, num_cards, result)
+            for (text, num_cards, future), result in zip(batch, results)
+        ))
+        
+        if batch_succeeded and all(resolved):
+            self._record_batch_success()
+    
+    def _shrink_batch_size(self, failed_size: int) -> None:
+        """Halve the batch size after a batch of failed_size overloaded the backend."""
+        new_size = max(1, min(self._batch_size, failed_size) // 2)
+        self._batch_success_streak = 0
+        if new_size != self._batch_size:
+            logger.warning(f"Ollama batch of {failed_size} failed, reducing batch size {self._batch_size} -> {new_size}")
+            self._batch_size = new_size
+    
+    def _record_batch_success(self) -> None:
+        """Grow the batch size by 25% (up to OLLAMA_BATCH_SIZE) after a streak of successes."""
+        self._batch_success_streak += 1
+        if self._batch_success_streak < _BATCH_GROWTH_STREAK or self._batch_size >= settings.OLLAMA_BATCH_SIZE:
+            return
+        
+        new_size = min(settings.OLLAMA_BATCH_SIZE, max(self._batch_size + 1, int(self._batch_size * 1.25)))
+        logger.info(f"Ollama batches healthy, increasing batch size {self._batch_size} -> {new_size}")
+        self._batch_size = new_size
+        self._batch_success_streak = 0
+    
+    async def _resolve_batch_item(
+        self,
+        future: asyncio.Future,
+        text: str,
+        num_cards: int,
+        result: Optional[List[Flashcard]]
+    ) -> bool:
+        """
+        Settle one batched future, generating individually if needed.
+        
+        Returns:
+            False if generating for this item failed, True otherwise
+        """
+        if future.done():
+            return True
+        try:
+            if not result:
+                result = await self._generate_single(text, num_cards)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return False
+        if not future.done():
+            future.set_result(result)
+        return True
+    
+    async def _generate_batched(self, jobs: List[Tuple[str, int]]) -> List[Optional[List[Flashcard]]]:
+        """
+        Generate flashcards for several documents with one Ollama call.
+        
+        Args:
+            jobs: (text, num_cards) pairs, one per document
+        
+        Returns:
+            Flashcards per job, in order; None where the model returned none
+        """
+        documents = "\n".join(
+            _BATCH_DOCUMENT_TEMPLATE.format(doc_id=i, num_cards=n, text=_fit_prompt_text(text))
+            for i, (text, n) in enumerate(jobs, start=1)
+        )
+        prompt = _BATCH_PROMPT_TEMPLATE.format(num_docs=len(jobs), documents=documents)
+        # No per-call retries: _process_batch reacts to failures by splitting the batch
+        response_text = await self._call_ollama_api(
+            prompt,
+            _batch_response_schema(len(jobs)),
+            max_retries=0,
+            system_prompt=_BATCH_SYSTEM_PROMPT
+        )
+        
+        data = self._load_response_json(response_text)
+        if not isinstance(data, dict):
+            raise ValueError("Batched response was not a JSON object")
+        
+        logger.info(f"Generated flashcards for {len(jobs)} documents in one batched call")
+        
+        results: List[Optional[List[Flashcard]]] = []
+        for i, (_, n) in enumerate(jobs, start=1):
+            items = data.get(str(i))
+            cards = self._convert_to_flashcards(items) if isinstance(items, list) else []
+            results.append(cards[:n] or None)
+        return results
+    
+    @staticmethod
+    def _select_chunks(text: str, num_cards: int) -> List[str]:
+        """
+        Split text into the prompt-sized chunks that will be sent to the model.
+        
+        Never uses more chunks than cards requested or MAX_GENERATION_CHUNKS.
+        """
+        max_chunks = max(1, min(num_cards, settings.MAX_GENERATION_CHUNKS))
+        
+        # Only chunk the part of the document that can actually be used
+        head = text[:_MAX_PROMPT_TEXT_CHARS * max_chunks]
+        # Repeated chunks (even if only case or spacing differs) would only
+        # produce duplicate cards, so send each once
+        chunks = dedupe_chunks(chunk_text(head, max_chars=_MAX_PROMPT_TEXT_CHARS))[:max_chunks]
+        
+        return chunks or [text[:_MAX_PROMPT_TEXT_CHARS]]
+    
+    @staticmethod
+    def _distribute_cards(num_cards: int, num_chunks: int) -> List[int]:
+        """Spread num_cards as evenly as possible across num_chunks."""
+        base, extra = divmod(num_cards, num_chunks)
+        return [base + (1 if i < extra else 0) for i in range(num_chunks)]
+    
+    @staticmethod
+    def _merge_chunk_results(results: list, num_cards: int) -> List[Flashcard]:
+        """
+        Combine per-chunk results, dropping duplicate questions.
+        
+        Failed chunks are skipped as long as at least one chunk succeeded;
+        otherwise the first error is re-raised.
+        
+        Args:
+            results: Per-chunk flashcard lists or exceptions from asyncio.gather
+            num_cards: Maximum number of flashcards to return
+            
+        Returns:
+            Deduplicated list of at most num_cards flashcards
+        """
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        
+        for error in errors:
+            logger.warning(f"Skipping failed chunk during flashcard generation: {str(error)}")
+        
+        flashcards: List[Flashcard] = []
+        seen_questions = set()
+        
+        for result in results:
+            if isinstance(result, BaseException):
+                continue
+            for card in result:
+                key = card.question.lower()
+                if key in seen_questions:
+                    continue
+                seen_questions.add(key)
+                flashcards.append(card)
+        
+        return flashcards[:num_cards]
+    
+    @staticmethod
+    def _make_cache_key(model: str, text: str, num_cards: int) -> Tuple[str, int]:
+        """
+        Build the result-cache key for a generation request.
+        
+        Only the part of the text that can reach the model is hashed, after
+        collapsing whitespace and case, so resubmissions of the same notes
+        that differ only in formatting still hit the cache.
+        """
+        head = text[:_MAX_PROMPT_TEXT_CHARS * settings.MAX_GENERATION_CHUNKS]
+        normalized = " ".join(head.split()).lower()
+        digest = hashlib.blake2b(
+            f"{model}|{normalized}".encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        return digest, num_cards
+    
+    def _get_cached_flashcards(self, key: Tuple[str, int]) -> Optional[List[Flashcard]]:
+        """Return previously generated flashcards, if cached (Flashcard is frozen, so no copies)."""
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                return None
+            self._cache.move_to_end(key)
+        return list(cached)
+    
+    def _store_cached_flashcards(self, key: Tuple[str, int], flashcards: List[Flashcard]) -> None:
+        """Store generated flashcards, evicting the least recently used entry."""
+        if settings.FLASHCARD_CACHE_SIZE <= 0:
+            return
+        
+        with self._cache_lock:
+            self._cache[key] = tuple(flashcards)
+            self._cache.move_to_end(key)
+            while len(self._cache) > settings.FLASHCARD_CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
+    async def _embed_for_cache(self, text: str) -> Optional[List[float]]:
+        """
+        Embed the prompt-sized head of the text for the semantic cache.
+        
+        Returns None when the semantic cache is disabled or the embedding
+        call fails; generation then proceeds without it.
+        """
+        if self._semantic_cache is None:
+            return None
+        
+        try:
+            async with self._request_semaphore:
+                response = await self.client.embed(
+                    model=settings.OLLAMA_EMBED_MODEL,
+                    input=_fit_prompt_text(text)
+                )
+            return response["embeddings"][0]
+        except Exception as e:
+            logger.warning(f"Embedding for semantic cache failed, skipping it: {str(e)}")
+            return None
+    
     def _build_flashcard_prompt(self, text: str, num_cards: int) -> str:
         """
-        Build the prompt for flashcard generation.
+        Build the user prompt for flashcard generation.
+        
+        Only the card count and source text; the instructions are sent
+        separately as _FLASHCARD_SYSTEM_PROMPT.
         
         Args:
             text: Source text
@@ -80,33 +750,27 @@ class LLMService:
         Returns:
             Formatted prompt string
         """
-        # Truncate text if too long (LLMs have context limits)
-        max_text_length = 5000
-        truncated_text = text[:max_text_length] if len(text) > max_text_length else text
-        
-        prompt = f"""Generate exactly {num_cards} educational flashcards from the following text.
-
-IMPORTANT: Return ONLY a JSON array of objects. Each object must have exactly two fields:
-- "question": A clear, specific question
-- "answer": A concise, accurate answer
-
-Format example:
-[
-  {{"question": "What is...", "answer": "It is..."}},
-  {{"question": "How does...", "answer": "It works by..."}}
-]
-
-Text to analyze:
-{truncated_text}
-"""
-        return prompt
+        # Compact and truncate text (LLMs have context limits)
+        return _render_flashcard_prompt(num_cards, _fit_prompt_text(text))
     
-    def _call_ollama_api(self, prompt: str) -> str:
+    async def _call_ollama_api(
+        self,
+        prompt: str,
+        response_format: dict = _FLASHCARD_RESPONSE_SCHEMA,
+        max_retries: Optional[int] = None,
+        system_prompt: str = _FLASHCARD_SYSTEM_PROMPT
+    ) -> str:
         """
         Call Ollama API with the given prompt.
         
+        Timeouts, dropped connections, and overload responses (429/5xx) are
+        retried with jittered exponential backoff.
+        
         Args:
             prompt: The prompt to send
+            response_format: JSON schema the response must follow
+            max_retries: Retries for transient failures (defaults to OLLAMA_MAX_RETRIES)
+            system_prompt: Static instructions sent ahead of the prompt
             
         Returns:
             Raw response text from Ollama
@@ -114,24 +778,41 @@ Text to analyze:
         Raises:
             ValueError: If API call fails
         """
-        messages = [{"role": "user", "content": prompt}]
-        response_text = ""
+        if max_retries is None:
+            max_retries = settings.OLLAMA_MAX_RETRIES
         
-        try:
-            # Stream response from Ollama
-            for part in self.client.chat(self.model, messages=messages, stream=True):
-                response_text += part["message"]["content"]
-            
-            return response_text
-            
-        except Exception as e:
-            logger.error(f"Ollama API call failed: {str(e)}")
-            raise ValueError(f"Failed to communicate with AI service: {str(e)}")
+        messages = _chat_messages(system_prompt, prompt)
+        attempt = 0
+        
+        while True:
+            try:
+                # Single non-streaming call; structured output returns the JSON directly
+                async with self._request_semaphore:
+                    response = await self.client.chat(
+                        self.model,
+                        messages=messages,
+                        format=response_format,
+                        options={"temperature": settings.OLLAMA_TEMPERATURE}
+                    )
+                return response["message"]["content"]
+                
+            except Exception as e:
+                if attempt < max_retries and _is_transient_error(e):
+                    # Back off outside the semaphore so other requests can proceed
+                    delay = _RETRY_BASE_DELAY_SECONDS * (2 ** attempt) * (1 + random.random())
+                    attempt += 1
+                    logger.warning(f"Ollama API call failed ({str(e)}), retry {attempt}/{max_retries} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                
+                logger.error(f"Ollama API call failed: {str(e)}")
+                raise ValueError(f"Failed to communicate with AI service: {str(e)}") from e
     
     def _parse_flashcard_response(self, response_text: str) -> List[Flashcard]:
         """
         Parse Ollama response into validated Flashcard objects.
-        Handles responses with or without markdown code blocks.
+        Structured output normally yields bare JSON; responses wrapped in
+        markdown code blocks or prose are still handled as a fallback.
         
         Args:
             response_text: Raw text response from Ollama
@@ -142,18 +823,7 @@ Text to analyze:
         Raises:
             ValueError: If response cannot be parsed into valid flashcards
         """
-        # Remove markdown code blocks if present
-        cleaned_text = self._clean_markdown(response_text)
-        
-        # Extract JSON array from response
-        json_text = self._extract_json_array(cleaned_text)
-        
-        # Parse JSON
-        try:
-            data = json.loads(json_text)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing failed: {str(e)}\nResponse: {response_text[:500]}")
-            raise ValueError("AI returned invalid response format. Please try again.")
+        data = self._load_response_json(response_text)
         
         # Handle different response structures
         data = self._normalize_response_structure(data)
@@ -166,21 +836,101 @@ Text to analyze:
         
         return flashcards
     
+    def _load_response_json(self, response_text: str):
+        """
+        Decode the JSON payload of an Ollama response.
+        
+        Raises:
+            ValueError: If no valid JSON can be found in the response
+        """
+        # Fast path: structured output returns bare JSON
+        data = self._try_parse_bare_json(response_text)
+        if data is not None:
+            return data
+        
+        # Extract the JSON block from markdown fences or surrounding prose
+        json_text = self._extract_json_block(response_text)
+        
+        try:
+            return _json_loads(json_text)
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON parsing failed: {str(e)}\nResponse: {response_text[:500]}")
+            raise ValueError("AI returned invalid response format. Please try again.")
+    
     @staticmethod
-    def _clean_markdown(text: str) -> str:
-        """Remove markdown code blocks from text."""
-        cleaned = re.sub(r'```(?:json)?\s*\n?', '', text)
-        cleaned = cleaned.replace('```', '').strip()
-        return cleaned
+    def _try_parse_bare_json(text: str):
+        """
+        Parse text directly if it is already a bare JSON object or array.
+        
+        Skips the markdown/regex cleanup entirely for the common case
+        where the model returns nothing but JSON.
+        
+        Args:
+            text: Raw text response from Ollama
+            
+        Returns:
+            Parsed JSON value, or None if the text needs the cleanup path
+        """
+        stripped = text.strip()
+        if not (
+            (stripped.startswith('[') and stripped.endswith(']'))
+            or (stripped.startswith('{') and stripped.endswith('}'))
+        ):
+            return None
+        
+        try:
+            return _json_loads(stripped)
+        except json.JSONDecodeError:
+            return None
     
     @staticmethod
-    def _extract_json_array(text: str) -> str:
-        """Extract JSON array pattern from text."""
-        # Try to find JSON array in the response like [{...}, {...}]
-        json_match = re.search(r'\[\s*\{.*?\}\s*\]', text, re.DOTALL)
-        if json_match:
-            return json_match.group(0)
-        return text
+    def _extract_json_block(text: str) -> str:
+        """
+        Extract the first balanced JSON array or object from text.
+        
+        Single linear scan that tracks bracket depth and skips over string
+        literals, so markdown fences and prose around the JSON are ignored
+        without any regex backtracking. Only brackets, quotes and
+        backslashes are visited.
+        
+        Args:
+            text: Raw text that may contain a JSON block
+            
+        Returns:
+            The JSON block, or the stripped text if none is found
+        """
+        starts = [pos for pos in (text.find('['), text.find('{')) if pos != -1]
+        if not starts:
+            return text.strip()
+        start = min(starts)
+        
+        depth = 0
+        in_string = False
+        escaped_pos = -1  # Index of the character escaped by a backslash
+        
+        # Only visit characters that matter; everything between is skipped in C
+        for match in _JSON_STRUCTURE_RE.finditer(text, start):
+            pos = match.start()
+            char = text[pos]
+            
+            if in_string:
+                if pos == escaped_pos:
+                    continue
+                if char == '\\':
+                    escaped_pos = pos + 1
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '[' or char == '{':
+                depth += 1
+            elif char == ']' or char == '}':
+                depth -= 1
+                if depth == 0:
+                    return text[start:pos + 1]
+        
+        # Unbalanced (e.g. truncated output) - let the JSON parser report it
+        return text[start:]
     
     @staticmethod
     def _normalize_response_structure(data) -> list:
@@ -208,31 +958,122 @@ Text to analyze:
         Returns:
             List of validated Flashcard objects
         """
-        flashcards = []
+        # Keep just the two card fields of well-formed items, so extra keys
+        # (e.g. "explanation") or one blank card don't fail the whole list
+        cards = [
+            {"question": item["question"], "answer": item["answer"]}
+            for item in data
+            if isinstance(item, dict)
+            and isinstance(item.get("question"), str) and item["question"].strip()
+            and isinstance(item.get("answer"), str) and item["answer"].strip()
+        ]
+        skipped = len(data) - len(cards)
         
-        for i, item in enumerate(data):
-            try:
-                if not isinstance(item, dict):
-                    logger.warning(f"Skipping invalid flashcard at index {i}: not a dict")
-                    continue
-                
-                # Extract question and answer
-                question = item.get("question", "").strip()
-                answer = item.get("answer", "").strip()
-                
-                if not question or not answer:
-                    logger.warning(f"Skipping flashcard at index {i}: missing question or answer")
-                    continue
-                
-                # Create and validate flashcard
-                flashcard = Flashcard(question=question, answer=answer)
-                flashcards.append(flashcard)
-                
-            except Exception as e:
-                logger.warning(f"Failed to parse flashcard at index {i}: {str(e)}")
-                continue
+        # Validate the whole list in a single pydantic-core call
+        try:
+            flashcards = FLASHCARDS_ADAPTER.validate_python(cards)
+        except ValidationError:
+            # Otherwise salvage the usable items one at a time
+            flashcards = []
+            for card in cards:
+                try:
+                    flashcards.append(Flashcard.model_validate(card))
+                except ValidationError:
+                    skipped += 1
+        
+        if skipped:
+            logger.warning(f"Skipped {skipped} malformed flashcard(s) in AI response")
         
         return flashcards
+    
+    @staticmethod
+    def _to_flashcard(item) -> Optional[Flashcard]:
+        """
+        Convert a single parsed item to a Flashcard.
+        
+        Args:
+            item: Parsed JSON value for one flashcard
+            
+        Returns:
+            Flashcard, or None if the item is malformed
+        """
+        if not isinstance(item, dict):
+            return None
+        
+        # Extract question and answer
+        question = item.get("question")
+        answer = item.get("answer")
+        if not isinstance(question, str) or not isinstance(answer, str):
+            return None
+        
+        if not question.strip() or not answer.strip():
+            return None
+        
+        # trusted: from our own LLM parser, checked non-empty above
+        return Flashcard.fast_construct(question, answer)
+
+
+class _FlashcardStreamParser:
+    """
+    Incrementally extracts flashcard objects from streamed JSON text.
+    
+    Tracks container nesting and string state across chunks and emits
+    every object that sits directly inside an array as soon as its closing
+    brace arrives. Works for both a bare array and {"flashcards": [...]}.
+    """
+    
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._capturing = False
+        self._capture_depth = 0
+    
+    def feed(self, chunk: str) -> List[dict]:
+        """
+        Feed the next chunk of streamed text.
+        
+        Args:
+            chunk: Next piece of model output
+            
+        Returns:
+            Flashcard dictionaries completed by this chunk
+        """
+        completed: List[dict] = []
+        
+        for char in chunk:
+            if self._capturing:
+                self._buffer.append(char)
+            
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            
+            if char == '"':
+                self._in_string = True
+            elif char == '[' or char == '{':
+                if char == '{' and not self._capturing and self._stack and self._stack[-1] == '[':
+                    self._capturing = True
+                    self._buffer = [char]
+                    self._capture_depth = len(self._stack)
+                self._stack.append(char)
+            elif char == ']' or char == '}':
+                if self._stack:
+                    self._stack.pop()
+                if self._capturing and len(self._stack) == self._capture_depth:
+                    self._capturing = False
+                    try:
+                        completed.append(_json_loads("".join(self._buffer)))
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping unparseable flashcard in streamed AI response")
+        
+        return completed
 
 
 # Singleton instance
@@ -252,8 +1093,14 @@ def get_llm_service() -> LLMService:
     return _llm_service_instance
 
 
+async def shutdown_llm_service() -> None:
+    """Stop the LLM service's background batch tasks, if the service was created."""
+    if _llm_service_instance is not None:
+        await _llm_service_instance.shutdown_batching()
+
+
 # Convenience function for backward compatibility
-def generate_flashcards_with_ollama(text: str, num_cards: int = None) -> List[Flashcard]:
+async def generate_flashcards_with_ollama(text: str, num_cards: int = None) -> List[Flashcard]:
     """
     Generate flashcards using Ollama. Wrapper function.
     
@@ -265,4 +1112,4 @@ def generate_flashcards_with_ollama(text: str, num_cards: int = None) -> List[Fl
         List of Flashcard objects
     """
     service = get_llm_service()
-    return service.generate_flashcards(text, num_cards)
\ No newline at end of file
+    return await service.generate_flashcards(text, num_cards)
\ No newline at end of file
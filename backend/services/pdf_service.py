@@ -3,15 +3,87 @@ PDF processing service for AI-Learning API.
 Handles file validation, text extraction, and processing.
 """
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from fastapi import UploadFile, HTTPException
+from typing import List, Optional, Tuple, Union
+import asyncio
+import hashlib
 import logging
+import multiprocessing
+import os
 
-from utils.text_utils import process_pdf_content, chunk_text
+from utils.text_utils import (
+    process_pdf_content,
+    clean_extracted_text,
+    extract_pdf_page_range,
+    get_pdf_page_count,
+    chunk_text,
+    chunk_text_spans,
+    dedupe_chunk_spans,
+    dedupe_chunks
+)
 from config import settings
 from models import FileInfo
 
 logger = logging.getLogger(__name__)
 
+# Size of each read when streaming an upload into memory
+_UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
+
+# Lowercased allowed extensions for O(1) membership checks
+_ALLOWED_EXTENSIONS = frozenset(ext.lower() for ext in settings.ALLOWED_FILE_TYPES)
+
+# Worker processes for page-parallel PDF extraction; created on first large PDF
+_pdf_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pdf_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared PDF extraction pool, or None if PDF_WORKERS is 0."""
+    global _pdf_process_pool
+    if _pdf_process_pool is None and settings.PDF_WORKERS > 0:
+        # spawn rather than fork: the parent runs an event loop and thread pools
+        _pdf_process_pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pdf_process_pool
+
+
+def shutdown_pdf_process_pool() -> None:
+    """Stop the PDF extraction worker processes, if any were started."""
+    global _pdf_process_pool
+    if _pdf_process_pool is not None:
+        _pdf_process_pool.shutdown(cancel_futures=True)
+        _pdf_process_pool = None
+
+
+# Extracted text of recently uploaded PDFs, keyed by a digest of the file bytes
+_extracted_text_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+
+def _content_digest(content: Union[bytes, bytearray, memoryview]) -> bytes:
+    """Hash PDF bytes for the extraction cache (BLAKE2b, 128-bit)."""
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def _get_cached_text(digest: bytes) -> Optional[str]:
+    """Return previously extracted text for a PDF, if cached."""
+    text = _extracted_text_cache.get(digest)
+    if text is not None:
+        _extracted_text_cache.move_to_end(digest)
+    return text
+
+
+def _store_cached_text(digest: bytes, text: str) -> None:
+    """Store extracted text, evicting the least recently used entry."""
+    if settings.PDF_CACHE_SIZE <= 0:
+        return
+    _extracted_text_cache[digest] = text
+    _extracted_text_cache.move_to_end(digest)
+    while len(_extracted_text_cache) > settings.PDF_CACHE_SIZE:
+        _extracted_text_cache.popitem(last=False)
+
 
 class PDFService:
     """Service for handling PDF upload and processing operations."""
@@ -37,22 +109,8 @@ class PDFService:
                 detail=f"Only {', '.join(settings.ALLOWED_FILE_TYPES)} files are supported"
             )
         
-        # Read file content
-        try:
-            content = await file.read()
-        except Exception as e:
-            logger.error(f"Failed to read uploaded file: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to read uploaded file. Please try again."
-            )
-        
-        # Validate file size
-        if len(content) > settings.max_file_size_bytes:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File size exceeds {settings.MAX_FILE_SIZE_MB}MB limit"
-            )
+        # Read file content (validates size while reading)
+        content = await PDFService._read_upload_limited(file)
         
         if len(content) == 0:
             raise HTTPException(
@@ -60,10 +118,20 @@ class PDFService:
                 detail="Uploaded file is empty"
             )
         
-        # Extract and process text
+        # Re-uploads of the same PDF reuse the earlier extraction
+        digest = None
+        extracted_text = None
+        if settings.PDF_CACHE_SIZE > 0:
+            digest = await asyncio.to_thread(_content_digest, content)
+            extracted_text = _get_cached_text(digest)
+            if extracted_text is not None:
+                logger.info(f"Using cached extraction ({len(extracted_text)} characters) for PDF: {file.filename}")
+        
+        # Extract and process text (CPU-bound, so keep it off the event loop)
         try:
-            extracted_text = process_pdf_content(content)
-            logger.info(f"Successfully extracted {len(extracted_text)} characters from PDF: {file.filename}")
+            if extracted_text is None:
+                extracted_text = await PDFService._extract_pdf_text(content)
+                logger.info(f"Successfully extracted {len(extracted_text)} characters from PDF: {file.filename}")
         except Exception as e:
             logger.error(f"PDF processing failed for {file.filename}: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -78,6 +146,9 @@ class PDFService:
                 detail="No text could be extracted from the PDF. The file might be image-based or corrupted."
             )
         
+        if digest is not None:
+            _store_cached_text(digest, extracted_text)
+        
         # Create file info
         file_info = FileInfo(
             filename=file.filename,
@@ -89,9 +160,95 @@ class PDFService:
         return extracted_text, file_info
     
     @staticmethod
-    def _is_valid_file_type(filename: str) -> bool:
+    async def _read_upload_limited(file: UploadFile) -> memoryview:
+        """
+        Read an uploaded file in chunks, aborting once it exceeds the size limit.
+        
+        Avoids buffering an oversized upload in full before rejecting it.
+        Starlette already spools the request body to a temporary file, so
+        this is the only in-memory copy; it is returned as a zero-copy view
+        (PyMuPDF reads buffers directly) rather than duplicated into bytes.
+        
+        Args:
+            file: Uploaded file
+            
+        Returns:
+            Read-only view of the file content
+            
+        Raises:
+            HTTPException: If the file is too large or cannot be read
+        """
+        limit = settings.max_file_size_bytes
+        too_large = HTTPException(
+            status_code=413,
+            detail=f"File size exceeds {settings.MAX_FILE_SIZE_MB}MB limit"
+        )
+        
+        # Starlette records the spooled size while parsing the form; reject without reading
+        if file.size is not None and file.size > limit:
+            raise too_large
+        
+        buffer = bytearray()
+        try:
+            while True:
+                chunk = await file.read(_UPLOAD_READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                buffer.extend(chunk)
+                if len(buffer) > limit:
+                    raise too_large
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to read uploaded file: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to read uploaded file. Please try again."
+            )
+        
+        return memoryview(buffer).toreadonly()
+    
+    @staticmethod
+    async def _extract_pdf_text(content: Union[bytes, memoryview]) -> str:
+        """
+        Extract and clean PDF text without blocking the event loop.
+        
+        With PDF_WORKERS configured, PDFs of at least PDF_PARALLEL_MIN_PAGES
+        pages are split into contiguous page ranges extracted in parallel
+        worker processes and reassembled in order; everything else is
+        extracted in a single thread.
+        
+        Args:
+            content: Raw PDF file bytes
+            
+        Returns:
+            Cleaned, extracted text
+        """
+        pool = _get_pdf_process_pool()
+        if pool is None:
+            return await asyncio.to_thread(process_pdf_content, content)
+        
+        page_count = await asyncio.to_thread(get_pdf_page_count, content)
+        if page_count < settings.PDF_PARALLEL_MIN_PAGES:
+            return await asyncio.to_thread(process_pdf_content, content)
+        
+        # Worker processes need a picklable copy of the file
+        data = bytes(content)
+        pages_per_task = -(-page_count // settings.PDF_WORKERS)
+        loop = asyncio.get_running_loop()
+        
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, extract_pdf_page_range, data, start, start + pages_per_task)
+            for start in range(0, page_count, pages_per_task)
+        ))
+        logger.info(f"Extracted {page_count} PDF pages across {len(parts)} worker processes")
+        
+        return await asyncio.to_thread(clean_extracted_text, " ".join(parts))
+    
+    @staticmethod
+    def _is_valid_file_type(filename: Optional[str]) -> bool:
         """Check if filename has a valid extension."""
-        return any(filename.lower().endswith(ext) for ext in settings.ALLOWED_FILE_TYPES)
+        return os.path.splitext(filename or "")[1].lower() in _ALLOWED_EXTENSIONS
     
     @staticmethod
     def validate_text_length(text: str) -> None:
@@ -139,21 +296,49 @@ class PDFService:
     @staticmethod
     def chunk_text_safely(text: str) -> list[str]:
         """
-        Safely chunk text with error handling.
+        Safely chunk text with error handling, dropping repeated chunks.
         
         Args:
             text: Text to chunk
             
         Returns:
-            List of text chunks
+            List of distinct text chunks
             
         Raises:
             HTTPException: If chunking fails
         """
         try:
             chunks = chunk_text(text)
-            logger.info(f"Text split into {len(chunks)} chunks")
-            return chunks
+            unique = dedupe_chunks(chunks)
+            logger.info(f"Text split into {len(unique)} chunks ({len(chunks) - len(unique)} duplicates dropped)")
+            return unique
+        except Exception as e:
+            logger.error(f"Text chunking failed: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to process text. Please try again."
+            )
+    
+    @staticmethod
+    def chunk_spans_safely(text: str) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Safely chunk text into deduplicated (start, end) offsets with error handling.
+        
+        Args:
+            text: Text to chunk
+            
+        Returns:
+            Tuple of (chunk offsets into text, number of duplicate chunks dropped)
+            
+        Raises:
+            HTTPException: If chunking fails
+        """
+        try:
+            spans = chunk_text_spans(text)
+            unique = dedupe_chunk_spans(text, spans)
+            duplicates = len(spans) - len(unique)
+            logger.info(f"Text split into {len(unique)} chunks ({duplicates} duplicates dropped)")
+            return unique, duplicates
         except Exception as e:
             logger.error(f"Text chunking failed: {str(e)}")
             raise HTTPException(
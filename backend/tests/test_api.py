@@ -0,0 +1,124 @@
+"""
+Tests for the API routes, with Ollama replaced by a fake client.
+Run from backend/: python -m unittest discover tests
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("OLLAMA_API_KEY", "test-key")
+
+import orjson
+from fastapi.testclient import TestClient
+
+from main import app
+from routers import api
+
+
+class FakeStreamingClient:
+    """Streams a flashcard response a few characters at a time."""
+    
+    def __init__(self, num_cards: int = 5):
+        cards = [{"question": f"Question {i}?", "answer": f"Answer {i}."} for i in range(num_cards)]
+        self.response = orjson.dumps({"flashcards": cards}).decode()
+        self.calls = 0
+        self.closed = 0
+    
+    async def chat(self, model, messages, stream=False, **kwargs):
+        self.calls += 1
+        if not stream:
+            return {"message": {"content": self.response}}
+        
+        async def parts():
+            try:
+                for i in range(0, len(self.response), 7):
+                    yield {"message": {"content": self.response[i:i + 7]}}
+            finally:
+                self.closed += 1
+        
+        return parts()
+
+
+class FailingClient:
+    async def chat(self, *args, **kwargs):
+        raise RuntimeError("backend unavailable")
+
+
+class ApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        previous = api.llm_service._client
+        self.addCleanup(setattr, api.llm_service, "_client", previous)
+    
+    def use_ollama(self, fake):
+        api.llm_service._client = fake
+        return fake
+
+
+class GenerateStreamTests(ApiTestCase):
+    """/generate/stream sends one NDJSON line per card, uncompressed."""
+    
+    def test_streams_requested_number_of_cards(self):
+        fake = self.use_ollama(FakeStreamingClient(num_cards=5))
+        
+        response = self.client.post(
+            "/generate/stream",
+            json={"text": "Streaming source text.", "mode": "flashcards", "num_cards": 3},
+            headers={"Accept-Encoding": "gzip"}
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        self.assertNotIn("content-encoding", response.headers)
+        lines = [orjson.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([line["question"] for line in lines], ["Question 0?", "Question 1?", "Question 2?"])
+        # The upstream stream is closed once enough cards were parsed
+        self.assertEqual(fake.closed, 1)
+    
+    def test_failure_ends_with_error_line(self):
+        self.use_ollama(FailingClient())
+        
+        response = self.client.post(
+            "/generate/stream",
+            json={"text": "Streaming text that fails.", "mode": "flashcards", "num_cards": 3}
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        last = orjson.loads(response.text.splitlines()[-1])
+        self.assertEqual(last["error"]["code"], "GENERATION_FAILED")
+
+
+class GenerateEtagTests(ApiTestCase):
+    """/generate answers a matching If-None-Match with 304 and no model call."""
+    
+    BODY = {"text": "Revalidated source text.", "mode": "flashcards", "num_cards": 2}
+    
+    def test_matching_etag_returns_304_without_generating(self):
+        fake = self.use_ollama(FakeStreamingClient(num_cards=2))
+        
+        first = self.client.post("/generate", json=self.BODY)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["etag"]
+        self.assertTrue(etag.startswith('W/"'))
+        calls = fake.calls
+        
+        second = self.client.post("/generate", json=self.BODY, headers={"If-None-Match": etag})
+        
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers["etag"], etag)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(fake.calls, calls)
+    
+    def test_etag_changes_with_the_inputs(self):
+        self.use_ollama(FakeStreamingClient(num_cards=3))
+        
+        first = self.client.post("/generate", json=self.BODY)
+        other = self.client.post("/generate", json={**self.BODY, "num_cards": 3})
+        self.assertNotEqual(first.headers["etag"], other.headers["etag"])
+        
+        stale = self.client.post("/generate", json={**self.BODY, "num_cards": 3}, headers={"If-None-Match": first.headers["etag"]})
+        self.assertEqual(stale.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests for the semantic flashcard cache.
+Run from backend/: python -m unittest discover tests
+"""
+
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OLLAMA_API_KEY", "test-key")
+
+import orjson
+
+from config import settings
+from models import Flashcard
+from services.cache_service import SemanticCache
+from services.llm_service import LLMService
+
+CARDS = [Flashcard(question="What is mitosis?", answer="Cell division.")]
+
+
+class SemanticCacheTests(unittest.TestCase):
+    """Entries match by cosine similarity, card count, and recency."""
+    
+    def test_similar_embedding_hits(self):
+        cache = SemanticCache(max_entries=4, threshold=0.95)
+        cache.put("a", [1.0, 0.0, 0.1], 5, CARDS)
+        
+        self.assertEqual(cache.get([2.0, 0.0, 0.2], 5), CARDS)  # Same direction, different length
+        self.assertEqual(cache.get([1.0, 0.05, 0.1], 5), CARDS)
+    
+    def test_dissimilar_embedding_misses(self):
+        cache = SemanticCache(max_entries=4, threshold=0.95)
+        cache.put("a", [1.0, 0.0], 5, CARDS)
+        
+        self.assertIsNone(cache.get([0.0, 1.0], 5))
+        self.assertIsNone(cache.get([1.0, 0.5], 5))
+    
+    def test_card_count_must_match(self):
+        cache = SemanticCache(max_entries=4, threshold=0.95)
+        cache.put("a", [1.0, 0.0], 5, CARDS)
+        
+        self.assertIsNone(cache.get([1.0, 0.0], 6))
+    
+    def test_zero_vector_and_dimension_mismatch_are_ignored(self):
+        cache = SemanticCache(max_entries=4, threshold=0.95)
+        cache.put("zero", [0.0, 0.0], 5, CARDS)
+        cache.put("a", [1.0, 0.0], 5, CARDS)
+        
+        self.assertIsNone(cache.get([0.0, 0.0], 5))
+        self.assertIsNone(cache.get([1.0, 0.0, 0.0], 5))
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SemanticCache(max_entries=2, threshold=0.95)
+        cache.put("a", [1.0, 0.0, 0.0], 5, CARDS)
+        cache.put("b", [0.0, 1.0, 0.0], 5, CARDS)
+        cache.get([1.0, 0.0, 0.0], 5)  # "a" is now the most recent
+        cache.put("c", [0.0, 0.0, 1.0], 5, CARDS)
+        
+        self.assertIsNotNone(cache.get([1.0, 0.0, 0.0], 5))
+        self.assertIsNone(cache.get([0.0, 1.0, 0.0], 5))
+        self.assertIsNotNone(cache.get([0.0, 0.0, 1.0], 5))
+
+
+class FakeEmbeddingClient:
+    """Embeds every text to the same vector unless it mentions "unrelated"."""
+    
+    def __init__(self):
+        self.chat_calls = 0
+    
+    async def embed(self, model, input):
+        return {"embeddings": [[0.0, 1.0] if "unrelated" in input else [1.0, 0.1]]}
+    
+    async def chat(self, model, messages, **kwargs):
+        self.chat_calls += 1
+        cards = [{"question": f"Question {self.chat_calls}?", "answer": "Answer."}]
+        return {"message": {"content": orjson.dumps({"flashcards": cards}).decode()}}
+
+
+class SemanticTierTests(unittest.IsolatedAsyncioTestCase):
+    """LLMService reuses cards for near-duplicate texts when an embed model is set."""
+    
+    def setUp(self):
+        patcher = mock.patch.object(settings, "OLLAMA_EMBED_MODEL", "test-embed")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = LLMService()
+        self.client = FakeEmbeddingClient()
+        self.service._client = self.client
+    
+    async def test_near_duplicate_text_reuses_cards(self):
+        first = await self.service.generate_flashcards("Mitosis is how cells divide.", num_cards=1)
+        second = await self.service.generate_flashcards("Mitosis is how a cell divides.", num_cards=1)
+        
+        self.assertEqual(second, first)
+        self.assertEqual(self.client.chat_calls, 1)
+    
+    async def test_unrelated_text_is_generated(self):
+        await self.service.generate_flashcards("Mitosis is how cells divide.", num_cards=1)
+        await self.service.generate_flashcards("An unrelated text about rivers.", num_cards=1)
+        
+        self.assertEqual(self.client.chat_calls, 2)
+    
+    async def test_disabled_without_embed_model(self):
+        with mock.patch.object(settings, "OLLAMA_EMBED_MODEL", ""):
+            service = LLMService()
+        self.assertIsNone(service._semantic_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+"""
+Tests for flashcard generation in LLMService (no Ollama server needed).
+Run from backend/: python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+os.environ.setdefault("OLLAMA_API_KEY", "test-key")
+
+import httpx
+import orjson
+
+from config import settings
+from services import llm_service
+from services.llm_service import LLMService
+
+
+class FakeOllamaClient:
+    """Stands in for ollama.AsyncClient, recording every chat call."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    async def chat(self, model, messages, **kwargs):
+        self.calls.append(messages)
+        cards = [{"question": f"Question {len(self.calls)}?", "answer": "Answer."}]
+        return {"message": {"content": orjson.dumps({"flashcards": cards}).decode()}}
+
+
+class ChunkSelectionTests(unittest.IsolatedAsyncioTestCase):
+    """Near-duplicate chunks are only sent to the model once."""
+    
+    def setUp(self):
+        self.service = LLMService()
+        self.client = FakeOllamaClient()
+        self.service._client = self.client
+    
+    async def test_chunks_differing_in_case_and_spacing_make_one_call(self):
+        # Each sentence fills most of a prompt chunk, so they can't be packed together
+        sentence = " ".join(["cells divide by mitosis"] * 150) + "."
+        variant = "  " + sentence.upper().replace(" ", "   ")
+        text = f"{sentence} {variant}"
+        
+        self.assertEqual(len(LLMService._select_chunks(text, 4)), 1)
+        
+        flashcards = await self.service.generate_flashcards(text, num_cards=4)
+        
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertTrue(flashcards)
+
+
+
+class ConvertToFlashcardsTests(unittest.TestCase):
+    """Parsed items are projected to question/answer before list validation."""
+    
+    def test_extra_keys_and_bad_items_do_not_force_the_slow_path(self):
+        data = [
+            {"question": " What is mitosis? ", "answer": "Cell division.", "explanation": "Extra key"},
+            {"question": "   ", "answer": "Blank question"},
+            "not a card",
+            {"question": 3, "answer": "Not a string"},
+            {"question": "What is meiosis?", "answer": "Division into gametes.", "topic": "Biology"},
+        ]
+        
+        with mock.patch.object(llm_service.Flashcard, "model_validate") as per_item:
+            flashcards = LLMService._convert_to_flashcards(data)
+        
+        per_item.assert_not_called()
+        self.assertEqual(
+            [(card.question, card.answer) for card in flashcards],
+            [("What is mitosis?", "Cell division."), ("What is meiosis?", "Division into gametes.")]
+        )
+
+
+class FlashcardStreamParserTests(unittest.TestCase):
+    """Cards are emitted as soon as their object closes, however the text is split."""
+    
+    RESPONSE = (
+        '{"flashcards": [{"question": "What does {x} mean?", "answer": "A \\"set\\" [of] things"},'
+        ' {"question": "Why?", "answer": "Because."}]}'
+    )
+    EXPECTED = [
+        {"question": "What does {x} mean?", "answer": 'A "set" [of] things'},
+        {"question": "Why?", "answer": "Because."},
+    ]
+    
+    def test_whole_response_in_one_chunk(self):
+        self.assertEqual(llm_service._FlashcardStreamParser().feed(self.RESPONSE), self.EXPECTED)
+    
+    def test_response_split_into_single_characters(self):
+        parser = llm_service._FlashcardStreamParser()
+        emitted = []
+        for index, char in enumerate(self.RESPONSE):
+            cards = parser.feed(char)
+            emitted.extend(cards)
+            if cards == [self.EXPECTED[0]]:
+                # The first card is available before the rest of the response arrives
+                self.assertLess(index, len(self.RESPONSE) - 30)
+        self.assertEqual(emitted, self.EXPECTED)
+    
+    def test_bare_array(self):
+        parser = llm_service._FlashcardStreamParser()
+        self.assertEqual(parser.feed('[{"question": "Q", "answer": "A"}'), [{"question": "Q", "answer": "A"}])
+        self.assertEqual(parser.feed("]"), [])
+    
+    def test_unparseable_object_is_skipped(self):
+        parser = llm_service._FlashcardStreamParser()
+        cards = parser.feed('[{"question": "Q" "answer"}, {"question": "Q2", "answer": "A2"}]')
+        self.assertEqual(cards, [{"question": "Q2", "answer": "A2"}])
+
+
+class FakeBatchingClient:
+    """Answers batched prompts, timing out on batches above max_batch documents."""
+    
+    def __init__(self, max_batch: int):
+        self.max_batch = max_batch
+        self.batch_sizes = []
+        self.single_calls = 0
+    
+    async def chat(self, model, messages, format=None, **kwargs):
+        if messages[0]["content"] != llm_service._BATCH_SYSTEM_PROMPT:
+            self.single_calls += 1
+            cards = [{"question": f"Single {self.single_calls}?", "answer": "Answer."}]
+            return {"message": {"content": orjson.dumps({"flashcards": cards}).decode()}}
+        
+        doc_ids = format["required"]
+        self.batch_sizes.append(len(doc_ids))
+        if len(doc_ids) > self.max_batch:
+            raise httpx.ReadTimeout("batch too large")
+        response = {doc_id: [{"question": f"Document {doc_id}?", "answer": "Answer."}] for doc_id in doc_ids}
+        return {"message": {"content": orjson.dumps(response).decode()}}
+
+
+class AdaptiveBatchingTests(unittest.IsolatedAsyncioTestCase):
+    """Coalesced batches shrink on overload and only grow on batched successes."""
+    
+    def setUp(self):
+        patcher = mock.patch.multiple(settings, OLLAMA_BATCH_WINDOW_MS=20, OLLAMA_BATCH_SIZE=8)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = LLMService()
+    
+    async def asyncTearDown(self):
+        await self.service.shutdown_batching()
+    
+    async def _process(self, texts):
+        loop = asyncio.get_running_loop()
+        batch = [(text, 1, loop.create_future()) for text in texts]
+        await self.service._process_batch(batch)
+        return [future.result() for _, _, future in batch]
+    
+    async def test_timed_out_batch_shrinks_and_splits(self):
+        client = FakeBatchingClient(max_batch=3)
+        self.service._client = client
+        
+        results = await asyncio.gather(*(
+            self.service._generate_for_chunk(f"Document text {i}.", 1) for i in range(6)
+        ))
+        
+        self.assertEqual(client.batch_sizes, [6, 3, 3])
+        self.assertEqual(self.service._batch_size, 3)
+        self.assertEqual(client.single_calls, 0)
+        self.assertTrue(all(results))
+    
+    async def test_batched_successes_grow_the_batch_size(self):
+        self.service._client = FakeBatchingClient(max_batch=8)
+        self.service._batch_size = 4
+        
+        for _ in range(llm_service._BATCH_GROWTH_STREAK):
+            await self._process(["First text.", "Second text."])
+        
+        self.assertEqual(self.service._batch_size, 5)
+    
+    async def test_single_item_batches_do_not_count_as_successes(self):
+        client = FakeBatchingClient(max_batch=8)
+        self.service._client = client
+        self.service._batch_size = 4
+        
+        for _ in range(llm_service._BATCH_GROWTH_STREAK + 1):
+            await self._process(["Only text."])
+        
+        self.assertEqual(client.batch_sizes, [])
+        self.assertEqual(self.service._batch_success_streak, 0)
+        self.assertEqual(self.service._batch_size, 4)
+    
+    async def test_shutdown_stops_the_batch_worker(self):
+        self.service._client = FakeBatchingClient(max_batch=8)
+        await self.service._generate_for_chunk("Some text.", 1)
+        self.assertTrue(self.service._batch_tasks)
+        
+        await self.service.shutdown_batching()
+        
+        self.assertFalse(self.service._batch_tasks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Tests for request model validation.
+Run from backend/: python -m unittest discover tests
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("OLLAMA_API_KEY", "test-key")
+
+from pydantic import ValidationError
+
+from config import settings
+from models import GenerateRequest
+
+
+class GenerateRequestTests(unittest.TestCase):
+    """num_cards falls back to the default and keeps its bounds; text limits apply after stripping."""
+    
+    def test_null_num_cards_uses_default(self):
+        request = GenerateRequest.model_validate_json('{"text": "Cells divide.", "mode": "flashcards", "num_cards": null}')
+        self.assertEqual(request.num_cards, settings.DEFAULT_FLASHCARD_COUNT)
+    
+    def test_num_cards_out_of_range_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            GenerateRequest(text="Cells divide.", mode="flashcards", num_cards=settings.MAX_FLASHCARD_COUNT + 1)
+    
+    def test_text_length_is_checked_after_stripping(self):
+        padded = "  \n" + "a" * settings.MAX_TEXT_LENGTH + "\n  "
+        request = GenerateRequest(text=padded, mode="flashcards")
+        self.assertEqual(len(request.text), settings.MAX_TEXT_LENGTH)
+        
+        with self.assertRaises(ValidationError):
+            GenerateRequest(text="a" * (settings.MAX_TEXT_LENGTH + 1), mode="flashcards")
+    
+    def test_whitespace_only_text_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            GenerateRequest(text="   \n  ", mode="flashcards")
+
+
+if __name__ == "__main__":
+    unittest.main()
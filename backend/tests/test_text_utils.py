@@ -0,0 +1,48 @@
+"""
+Tests for text chunking helpers.
+Run from backend/: python -m unittest discover tests
+"""
+
+import os
+import random
+import unittest
+
+os.environ.setdefault("OLLAMA_API_KEY", "test-key")
+
+from utils.text_utils import _SENTENCE_BREAK_RE, chunk_text, chunk_text_spans
+
+_PIECES = ["word", "a", "longerword", "x" * 30, ".", "!", "?", " ", "  ", "\n", "\t", " . ", "é"]
+
+
+def _random_texts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        text = "".join(rng.choice(_PIECES) for _ in range(rng.randint(0, 60)))
+        yield text, rng.randint(1, 40)
+
+
+class ChunkTextSpansTests(unittest.TestCase):
+    """chunk_text_spans packs and splits exactly like chunk_text."""
+    
+    def test_slices_match_chunks_for_single_spaced_text(self):
+        text = "First sentence here. Second one! A third? " + "y" * 50 + ". Last."
+        for max_chars in (5, 20, 45, 1000):
+            spans = chunk_text_spans(text, max_chars)
+            self.assertEqual([text[s:e] for s, e in spans], chunk_text(text, max_chars))
+    
+    def test_slices_match_chunks_up_to_whitespace_between_sentences(self):
+        # text[start:end] keeps the original separators; chunk_text joins with one space
+        for text, max_chars in _random_texts(5000):
+            spans = chunk_text_spans(text, max_chars)
+            slices = [_SENTENCE_BREAK_RE.sub(" ", text[s:e]) for s, e in spans]
+            self.assertEqual(slices, chunk_text(text, max_chars), (text, max_chars))
+    
+    def test_spans_never_start_or_end_with_whitespace(self):
+        for text, max_chars in _random_texts(5000, seed=1):
+            for start, end in chunk_text_spans(text, max_chars):
+                chunk = text[start:end]
+                self.assertEqual(chunk, chunk.strip(), (text, max_chars))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for the /upload size limit middleware.
+Run from backend/: python -m unittest discover tests
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("OLLAMA_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+
+from config import settings
+from main import app
+
+ORIGIN = settings.CORS_ORIGINS[0]
+
+
+class UploadSizeLimitTests(unittest.TestCase):
+    """/upload is rejected early by declared size, with responses the browser client can read."""
+    
+    def setUp(self):
+        self.client = TestClient(app)
+    
+    def test_oversized_upload_has_cors_headers(self):
+        response = self.client.post(
+            "/upload",
+            content=b"x",
+            headers={
+                "Origin": ORIGIN,
+                "Content-Length": str(settings.max_upload_body_bytes + 1),
+                "Content-Type": "multipart/form-data; boundary=x"
+            }
+        )
+        
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.headers.get("access-control-allow-origin"), ORIGIN)
+        self.assertIn("detail", response.json())
+
+    
+    def test_file_and_text_at_their_limits_are_not_rejected_early(self):
+        # The frontend sends both fields in one multipart body
+        body_size = settings.max_file_size_bytes + settings.MAX_TEXT_LENGTH * 4
+        response = self.client.post(
+            "/upload",
+            content=b"x",
+            headers={
+                "Origin": ORIGIN,
+                "Content-Length": str(body_size),
+                "Content-Type": "multipart/form-data; boundary=x"
+            }
+        )
+        
+        self.assertNotEqual(response.status_code, 413)
+    
+    def test_upload_without_content_length_is_rejected_with_411(self):
+        # A generator body is sent with chunked transfer encoding and no Content-Length
+        response = self.client.post(
+            "/upload",
+            content=iter([b"x"]),
+            headers={"Origin": ORIGIN, "Content-Type": "multipart/form-data; boundary=x"}
+        )
+        
+        self.assertEqual(response.status_code, 411)
+        self.assertEqual(response.headers.get("access-control-allow-origin"), ORIGIN)
+        self.assertIn("detail", response.json())
+    
+    def test_malformed_content_length_is_rejected_with_413(self):
+        response = self.client.post(
+            "/upload",
+            content=b"x",
+            headers={"Content-Length": "1e9", "Content-Type": "multipart/form-data; boundary=x"}
+        )
+        
+        self.assertEqual(response.status_code, 413)
+    
+    def test_other_routes_are_not_limited(self):
+        response = self.client.post(
+            "/generate",
+            content=b"{}",
+            headers={
+                "Content-Length": str(settings.max_upload_body_bytes + 1),
+                "Content-Type": "application/json"
+            }
+        )
+        
+        self.assertNotIn(response.status_code, (411, 413))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+"""
+Utility helpers for AI-Learning API.
+utils.text_utils is the single implementation; its main entry points are re-exported here.
+"""
+
+from utils.text_utils import (
+    chunk_text,
+    chunk_text_spans,
+    clean_extracted_text,
+    extract_text_from_pdf,
+    process_pdf_content
+)
+
+__all__ = [
+    "chunk_text",
+    "chunk_text_spans",
+    "clean_extracted_text",
+    "extract_text_from_pdf",
+    "process_pdf_content",
+]
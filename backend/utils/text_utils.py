@@ -3,11 +3,40 @@ Text processing utilities for AI-Learning API.
 Handles PDF extraction, text cleaning, and intelligent chunking.
 """
 
-from typing import List
+from typing import List, Tuple, Union
+import hashlib
 import re
-import fitz  # PyMuPDF
+import pymupdf
 from config import settings
 
+# Whitespace following sentence-ending punctuation
+_SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Common header/footer lines, as one alternation searched once per line
+_HEADER_FOOTER_RE = re.compile(
+    "|".join([
+        r'\b(?:Chapter|Section|Page)\s+\d+',  # Chapter 1, Section 2, Page 3
+        r'\b\d{1,2}/\d{1,2}/\d{4}',           # Dates (MM/DD/YYYY)
+        r'\b\d{1,2}:\d{2}',                   # Times (HH:MM)
+        r'\b(?:www\.|http://|https://)',      # URLs
+    ]),
+    re.IGNORECASE
+)
+_MULTI_SPACE_RE = re.compile(r' {2,}')
+# Hyphen + line break before a word; anchored on the literal "-" so the
+# engine jumps between hyphens instead of backtracking through every word
+_HYPHEN_BREAK_RE = re.compile(r'-\s*\n\s*(?=\w)')
+_WORD_RE = re.compile(r'\w+')
+_STRAY_PUNCT_RE = re.compile(r'\n\s*[.,;:!?]+\s*\n')
+_MULTI_NEWLINE_RE = re.compile(r'\n\s*\n\s*\n+')
+
+# Runs of sentence-ending punctuation (for approximate sentence counts)
+_SENTENCE_END_RE = re.compile(r'[.!?]+')
+
+# Plain-text extraction flags with ligatures expanded to their letters
+# (e.g. "fi") so words match downstream
+_PDF_TEXT_FLAGS = pymupdf.TEXTFLAGS_TEXT & ~pymupdf.TEXT_PRESERVE_LIGATURES
+
 
 def chunk_text(text: str, max_chars: int = None) -> List[str]:
     """
@@ -27,13 +56,12 @@ def chunk_text(text: str, max_chars: int = None) -> List[str]:
     if max_chars is None:
         max_chars = settings.CHUNK_SIZE_CHARS
     
-    # Split on sentence boundaries (., !, ?)
-    # This regex looks for sentence endings followed by whitespace
-    sentence_pattern = r'(?<=[.!?])\s+'
-    sentences = re.split(sentence_pattern, text)
+    # Split on sentence boundaries (., !, ?) followed by whitespace
+    sentences = _SENTENCE_BREAK_RE.split(text)
     
     chunks: List[str] = []
-    current_chunk = ""
+    current_parts: List[str] = []
+    current_len = 0  # Length of the parts plus one separator each
     
     for sentence in sentences:
         sentence = sentence.strip()
@@ -41,37 +69,184 @@ def chunk_text(text: str, max_chars: int = None) -> List[str]:
             continue
         
         # If adding this sentence would exceed max_chars
-        if len(current_chunk) + len(sentence) + 1 > max_chars:
+        if current_len + len(sentence) + 1 > max_chars:
             # Save current chunk if it has content
-            if current_chunk:
-                chunks.append(current_chunk.strip())
+            if current_parts:
+                chunks.append(" ".join(current_parts))
+                current_parts = []
+                current_len = 0
             
             # If single sentence is longer than max_chars, force split it
             if len(sentence) > max_chars:
                 # Split long sentence into smaller pieces
                 for i in range(0, len(sentence), max_chars):
                     chunks.append(sentence[i:i + max_chars].strip())
-                current_chunk = ""
-            else:
-                # Start new chunk with this sentence
-                current_chunk = sentence + " "
-        else:
-            # Add sentence to current chunk
-            current_chunk += sentence + " "
+                continue
+        
+        # Add sentence to current chunk
+        current_parts.append(sentence)
+        current_len += len(sentence) + 1
     
     # Don't forget the last chunk
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+    if current_parts:
+        chunks.append(" ".join(current_parts))
     
     return chunks
 
 
-def extract_text_from_pdf(pdf_content: bytes) -> str:
+def chunk_text_spans(text: str, max_chars: int = None) -> List[Tuple[int, int]]:
+    """
+    Chunk text on sentence boundaries, returning (start, end) offsets.
+    
+    Packs sentences exactly like chunk_text (same length measure, same
+    forced splits of over-long sentences, trimmed at both ends), but
+    returns offsets into the original text instead of building strings.
+    The only difference is between sentences: text[start:end] keeps the
+    original whitespace there, where chunk_text joins with one space.
+    
+    Args:
+        text: Text to chunk
+        max_chars: Maximum characters per chunk (defaults to config setting)
+        
+    Returns:
+        List of (start, end) offsets, one per chunk
+    """
+    if not text:
+        return []
+    
+    if max_chars is None:
+        max_chars = settings.CHUNK_SIZE_CHARS
+    
+    spans: List[Tuple[int, int]] = []
+    chunk_start = None
+    chunk_end = 0
+    current_len = 0  # Length of the sentences plus one separator each, as in chunk_text
+    
+    for start, end in _sentence_spans(text):
+        length = end - start
+        
+        # If adding this sentence would exceed max_chars
+        if current_len + length + 1 > max_chars:
+            if chunk_start is not None:
+                spans.append((chunk_start, chunk_end))
+                chunk_start = None
+                current_len = 0
+            
+            # If single sentence is longer than max_chars, force split it
+            if length > max_chars:
+                for i in range(start, end, max_chars):
+                    spans.append(_trim_span(text, i, min(i + max_chars, end)))
+                continue
+        
+        if chunk_start is None:
+            chunk_start = start
+        chunk_end = end
+        current_len += length + 1
+    
+    # Don't forget the last chunk
+    if chunk_start is not None:
+        spans.append((chunk_start, chunk_end))
+    
+    return spans
+
+
+def _trim_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Narrow (start, end) to exclude surrounding whitespace (empty if all whitespace)."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def dedupe_chunk_spans(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Drop spans whose chunk text repeats an earlier chunk.
+    
+    Long PDFs often repeat headers, footers, or boilerplate pages; keeping
+    only the first occurrence avoids paying for them again downstream.
+    Chunks that differ only in case or whitespace count as repeats; they
+    are compared by a BLAKE2b digest rather than kept as strings.
+    
+    Args:
+        text: Text the spans index into
+        spans: (start, end) chunk offsets
+        
+    Returns:
+        Spans of the first occurrence of each distinct chunk, in order
+    """
+    seen = set()
+    unique: List[Tuple[int, int]] = []
+    
+    for start, end in spans:
+        digest = _chunk_digest(text[start:end])
+        if digest in seen:
+            continue
+        seen.add(digest)
+        unique.append((start, end))
+    
+    return unique
+
+
+def dedupe_chunks(chunks: List[str]) -> List[str]:
+    """
+    Drop chunks that repeat an earlier chunk, ignoring case and whitespace.
+    
+    String counterpart of dedupe_chunk_spans, for callers that already
+    hold the chunk strings.
+    
+    Args:
+        chunks: Text chunks
+        
+    Returns:
+        First occurrence of each distinct chunk, in order
+    """
+    seen = set()
+    unique: List[str] = []
+    
+    for chunk in chunks:
+        digest = _chunk_digest(chunk)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        unique.append(chunk)
+    
+    return unique
+
+
+def _chunk_digest(chunk: str) -> bytes:
+    """BLAKE2b digest of a chunk with case and whitespace runs normalized."""
+    normalized = " ".join(chunk.split()).casefold()
+    return hashlib.blake2b(normalized.encode("utf-8", "ignore"), digest_size=16).digest()
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Return whitespace-trimmed (start, end) offsets of each sentence in text.
+    
+    The break pattern consumes all whitespace between sentences, so only
+    the ends of the text need trimming and no sentence is copied.
+    """
+    start = len(text) - len(text.lstrip())
+    end = len(text.rstrip())
+    
+    spans: List[Tuple[int, int]] = []
+    pos = start
+    for match in _SENTENCE_BREAK_RE.finditer(text, start, end):
+        spans.append((pos, match.start()))
+        pos = match.end()
+    if pos < end:
+        spans.append((pos, end))
+    
+    return spans
+
+
+def extract_text_from_pdf(pdf_content: Union[bytes, bytearray, memoryview]) -> str:
     """
     Extract text from PDF content using PyMuPDF.
     
     Args:
-        pdf_content: Raw PDF file bytes
+        pdf_content: Raw PDF file bytes (any buffer; not copied)
         
     Returns:
         Extracted text from all pages
@@ -82,22 +257,11 @@ def extract_text_from_pdf(pdf_content: bytes) -> str:
     doc = None
     try:
         # Open PDF from bytes
-        doc = fitz.open(stream=pdf_content, filetype="pdf")
-        text = ""
+        doc = pymupdf.open(stream=pdf_content, filetype="pdf")
         
-        # Extract text from each page
-        for page_num in range(doc.page_count):
-            page = doc[page_num]
-            page_text = page.get_text()
-            
-            # Add page text with separator
-            text += page_text
-            
-            # Add space between pages to prevent word concatenation
-            if page_num < doc.page_count - 1:
-                text += " "
-        
-        return text
+        # Extract text from each page, with a space between pages to
+        # prevent word concatenation (joined once rather than appended)
+        return " ".join(page.get_text("text", flags=_PDF_TEXT_FLAGS) for page in doc)
         
     except Exception as e:
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
@@ -108,11 +272,48 @@ def extract_text_from_pdf(pdf_content: bytes) -> str:
             doc.close()
 
 
+def get_pdf_page_count(pdf_content: Union[bytes, bytearray, memoryview]) -> int:
+    """
+    Count the pages in a PDF without extracting any text.
+    
+    Args:
+        pdf_content: Raw PDF file bytes
+        
+    Returns:
+        Number of pages
+    """
+    with pymupdf.open(stream=pdf_content, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def extract_pdf_page_range(pdf_content: bytes, start: int, stop: int) -> str:
+    """
+    Extract text from pages [start, stop) of a PDF.
+    
+    Pages are separated the same way as in extract_text_from_pdf, so the
+    ranges of a document joined with a space equal the full extraction.
+    Module-level so it can run in a worker process.
+    
+    Args:
+        pdf_content: Raw PDF file bytes
+        start: First page index (inclusive)
+        stop: Last page index (exclusive)
+        
+    Returns:
+        Extracted text from the page range
+    """
+    with pymupdf.open(stream=pdf_content, filetype="pdf") as doc:
+        return " ".join(doc[page_num].get_text("text", flags=_PDF_TEXT_FLAGS) for page_num in range(start, min(stop, doc.page_count)))
+
+
 def clean_extracted_text(text: str) -> str:
     """
     Clean and normalize extracted text from PDF.
     Removes headers, footers, page numbers, excessive whitespace, etc.
     
+    Lines are cleaned in a single pass; only the fixes that span line
+    breaks run as regexes over the joined text.
+    
     Args:
         text: Raw extracted text
         
@@ -122,58 +323,74 @@ def clean_extracted_text(text: str) -> str:
     if not text:
         return ""
     
-    # Remove excessive line breaks (more than 2 consecutive)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    # Remove page numbers (standalone numbers at start/end of lines)
-    text = re.sub(r'^\s*\d+\s*$', '', text, flags=re.MULTILINE)
-    
-    # Remove common header/footer patterns
-    header_footer_patterns = [
-        r'^.*\b(Chapter|Section|Page)\s+\d+.*$',  # Chapter 1, Section 2, Page 3
-        r'^.*\b\d{1,2}/\d{1,2}/\d{4}.*$',         # Dates (MM/DD/YYYY)
-        r'^.*\b\d{1,2}:\d{2}.*$',                 # Times (HH:MM)
-        r'^.*\b(www\.|http://|https://).*$',      # URLs
-    ]
-    
-    for pattern in header_footer_patterns:
-        text = re.sub(pattern, '', text, flags=re.MULTILINE | re.IGNORECASE)
-    
-    # Collapse multiple spaces into single space
-    text = re.sub(r' {2,}', ' ', text)
-    
-    # Remove leading/trailing whitespace from each line
-    lines = text.split('\n')
-    lines = [line.strip() for line in lines]
+    lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        
+        # Drop page numbers (standalone numbers) and header/footer lines
+        if line.isdecimal() or _HEADER_FOOTER_RE.search(line):
+            line = ""
+        elif '  ' in line:
+            # Collapse multiple spaces into single space
+            line = _MULTI_SPACE_RE.sub(' ', line)
+        
+        lines.append(line)
     
     # Remove empty lines at the beginning and end
-    while lines and not lines[0]:
-        lines.pop(0)
-    while lines and not lines[-1]:
-        lines.pop()
+    start = 0
+    end = len(lines)
+    while start < end and not lines[start]:
+        start += 1
+    while end > start and not lines[end - 1]:
+        end -= 1
     
     # Join lines back together
-    text = '\n'.join(lines)
+    text = '\n'.join(lines[start:end])
     
     # Fix common line break issues (hyphenated words split across lines)
-    # Pattern: "word-\nword" becomes "wordword"
-    text = re.sub(r'(\w+)-\s*\n\s*(\w+)', r'\1\2', text)
+    text = _join_hyphenated_words(text)
     
     # Remove stray punctuation at line breaks
-    text = re.sub(r'\n\s*[.,;:!?]+\s*\n', '\n', text)
+    text = _STRAY_PUNCT_RE.sub('\n', text)
     
     # Final cleanup: collapse multiple line breaks to maximum of 2
-    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+    text = _MULTI_NEWLINE_RE.sub('\n\n', text)
     
     return text.strip()
 
 
-def process_pdf_content(pdf_content: bytes) -> str:
+def _join_hyphenated_words(text: str) -> str:
+    r"""
+    Join words hyphenated across a line break ("word-\nword" -> "wordword").
+    
+    Equivalent to re.sub(r'(\w+)-\s*\n\s*(\w+)', r'\1\2', text): a join
+    consumes the word after the break, so that word cannot also start the
+    next join (in "a-\nb-\nc" only the first break is joined).
+    """
+    parts: List[str] = []
+    last = 0
+    consumed_end = 0  # End of the word taken by the previous join
+    
+    for match in _HYPHEN_BREAK_RE.finditer(text):
+        hyphen = match.start()
+        if hyphen == 0 or hyphen - 1 < consumed_end or not _WORD_RE.match(text, hyphen - 1):
+            continue
+        parts.append(text[last:hyphen])
+        last = match.end()
+        consumed_end = _WORD_RE.match(text, last).end()
+    
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def process_pdf_content(pdf_content: Union[bytes, bytearray, memoryview]) -> str:
     """
     Complete PDF processing pipeline: extract and clean text.
     
     Args:
-        pdf_content: Raw PDF file bytes
+        pdf_content: Raw PDF file bytes (any buffer; not copied)
         
     Returns:
         Cleaned, extracted text ready for processing
@@ -236,7 +453,7 @@ def get_text_stats(text: str) -> dict:
     lines = text.split('\n')
     
     # Count sentences (approximate - count sentence-ending punctuation)
-    sentences = re.split(r'[.!?]+', text)
+    sentences = _SENTENCE_END_RE.split(text)
     sentences = [s for s in sentences if s.strip()]
     
     return {
@@ -18,11 +18,15 @@ export interface FileInfo {
   filename: string | null;
   size: number;
   processed: boolean;
+  deduplicated_chunks?: number;
 }
 
 export interface UploadResponse {
   extracted_text: string;
-  chunks: string[];
+  // [start, end) in Unicode code points, not UTF-16 code units: text.slice()
+  // drifts after emoji and other astral characters, so slice Array.from(text)
+  chunk_offsets: [number, number][];
+  chunks?: string[];
   file_info?: FileInfo;
 }
 